@@ -1,13 +1,22 @@
 import streamlit as st
-import requests
 import json
-import googlemaps
 import random
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 from datetime import datetime
+import time
+import os
+import sqlite3
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import unquote
-import pandas as pd
+# requests / googlemaps / gspread / oauth2client는 무거워서(합계 약 0.4초) 필요한 함수 안에서 처음 쓸 때 import 합니다.
+# 페이지를 처음 열 때 DB(SQLite)만 읽는 경우에는 불러오지 않습니다. (benchmarks/import_budget.py로 확인)
+
+import place_classifier  # 스타일 태그 / 일정 버킷 분류
+import image_cache  # 장소 이미지 로컬 캐시
+import diagnostics  # 단계별 시간 / 호출 수 계측
+import cities  # 도시 이름 -> 표준 도시 ID
+import place_index  # 도시별 장소 열 배열 색인 (메모리)
 
 
 # --- 아래 코드를 추가하세요 ---
@@ -47,179 +56,906 @@ except:
         print("❌ 경고: service_account.json 파일을 찾을 수 없습니다.")
         GOOGLE_SHEET_CREDENTIALS = {}
 
-# 구글 시트 연결 함수
+# 구글 시트 연결 (프로세스 전체에서 한 번만 인증/열기 후 재사용)
+# 모듈은 Streamlit 세션/재실행 사이에 공유되므로, 여기 캐시도 모든 세션이 함께 씁니다.
+SHEET_SCOPE = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
+SHEET_MAX_AGE = 50 * 60  # 토큰 만료(1시간) 전에 미리 재인증
+SHEET_STATS = {"auth": 0, "open": 0, "reuse": 0}
+
+_sheet_cache = {"creds": None, "client": None, "sheet": None, "created": 0.0}
+_sheet_lock = threading.Lock()
+
+def _sheet_expired():
+    creds = _sheet_cache["creds"]
+    if creds is None or _sheet_cache["sheet"] is None: return True
+    if getattr(creds, "access_token_expired", False) and getattr(creds, "access_token", None): return True
+    return time.time() - _sheet_cache["created"] > SHEET_MAX_AGE
+
 def get_sheet():
-    scope = ['https://spreadsheets.google.com/feeds', 'https://www.googleapis.com/auth/drive']
-    # Streamlit Cloud 배포 환경
-    creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(GOOGLE_SHEET_CREDENTIALS), scope)
-    client = gspread.authorize(creds)
-    # 시트 이름이 'travel_db'인 파일을 엽니다. (파일 이름 정확해야 함!)
-    return client.open("travel_db").sheet1
-
-# DB 초기화 (구글 시트는 헤더만 있으면 되므로 패스)
+    with _sheet_lock:
+        if not _sheet_expired():
+            SHEET_STATS["reuse"] += 1
+            return _sheet_cache["sheet"]
+
+        with diagnostics.span("sheet.auth"):
+            import gspread
+            from oauth2client.service_account import ServiceAccountCredentials
+            # Streamlit Cloud 배포 환경
+            creds = ServiceAccountCredentials.from_json_keyfile_dict(dict(GOOGLE_SHEET_CREDENTIALS), SHEET_SCOPE)
+            # 클라이언트 안의 HTTP 세션(keep-alive)도 함께 재사용됩니다.
+            client = gspread.authorize(creds)
+        SHEET_STATS["auth"] += 1
+        with diagnostics.span("sheet.open"):
+            # 시트 이름이 'travel_db'인 파일을 엽니다. (파일 이름 정확해야 함!)
+            sheet = client.open(DB_NAME).sheet1
+        SHEET_STATS["open"] += 1
+        diagnostics.count("sheet.calls", 2)
+
+        _sheet_cache.update(creds=creds, client=client, sheet=sheet, created=time.time())
+        return sheet
+
+# 인증 오류 등으로 연결을 버리고 다음 호출 때 새로 만들고 싶을 때
+def reset_sheet():
+    with _sheet_lock:
+        _sheet_cache.update(creds=None, client=None, sheet=None, created=0.0)
+
+# ==========================================
+# 💾 저장소 계층 (SQLite가 기본, 구글 시트는 선택적 내보내기 대상)
+# ==========================================
+DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "travel_data.db")
+PLACE_COLUMNS = ["id", "source", "name", "city", "category", "lat", "lng",
+                 "address", "rating", "img_url", "desc", "updated_at"]
+# 수집 시점에 계산해서 SQLite에만 저장하는 열 (구글 시트에는 내보내지 않음)
+DERIVED_COLUMNS = {"bucket": "TEXT", "style_tags": "TEXT", "city_id": "TEXT"}
+STORE_COLUMNS = PLACE_COLUMNS + list(DERIVED_COLUMNS)
+# 다시 수집했을 때 값이 바뀌었는지 비교하는 열 (바뀐 행만 다시 씀)
+DELTA_COLUMNS = ["source", "name", "category", "lat", "lng", "address", "rating", "img_url", "desc"]
+# 처음 저장한 값을 유지하는 열: 제주 / 서귀포 검색에 같은 장소가 나와도 처음 도시에 그대로 둠 (다른 도시 후보에서 빠지지 않도록)
+KEEP_COLUMNS = ["city", "city_id"]
+# (도시, 제공자, 키워드) 요청이 이 시간(초) 안에 성공했으면 다시 보내지 않음
+FETCH_TTL = int(float(os.environ.get("FETCH_TTL_HOURS", 24)) * 3600)
+# 실패한 요청은 이 시간(초) 뒤에 다시 시도하고, 연속으로 실패할 때마다 2배씩 (최대 FETCH_TTL)
+FETCH_RETRY_BASE = 15 * 60
+# 아마데우스는 좌표 검색이라 키워드 대신 고정 값으로 기록 (저장된 장소가 늘어 중심 좌표가 바뀌어도 같은 요청)
+AMADEUS_KEYWORD = "pois"
+
+# 예전 Places API 사진 주소 (주소에 API 키가 그대로 들어 있어 마이그레이션에서 지움)
+LEGACY_PHOTO_PATTERN = "%maps.googleapis.com/maps/api/place/photo%"
+
+# 구글 시트 인증 정보가 있으면 SQLite에 저장한 뒤 시트에도 내보냅니다.
+SHEET_SYNC = bool(GOOGLE_SHEET_CREDENTIALS)
+
+class SQLitePlaceStore:
+    """로컬 SQLite 장소 저장소 (city / category / (lat, lng) 인덱스, WAL 모드)"""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._local = threading.local()  # Streamlit 세션(스레드)마다 커넥션을 따로 씁니다.
+        self._ready = False
+        self._init_lock = threading.Lock()
+        self._index = place_index.PlaceIndex()
+
+    def _conn(self):
+        # 테이블/열이 다 만들어지기 전에는 어떤 스레드도 쿼리하지 않도록 초기화부터 끝냄
+        if not self._ready:
+            self.init()
+        return self._connect()
+
+    def _connect(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def init(self):
+        with self._init_lock:
+            if self._ready: return
+            conn = self._connect()
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS places (
+                    id TEXT PRIMARY KEY, source TEXT, name TEXT, city TEXT, category TEXT,
+                    lat REAL, lng REAL, address TEXT, rating REAL, img_url TEXT, desc TEXT,
+                    updated_at DATETIME
+                );
+                CREATE INDEX IF NOT EXISTS idx_places_city ON places(city);
+                CREATE INDEX IF NOT EXISTS idx_places_category ON places(category);
+                CREATE INDEX IF NOT EXISTS idx_places_latlng ON places(lat, lng);
+                CREATE TABLE IF NOT EXISTS fetch_log (
+                    city TEXT, source TEXT, keyword TEXT, fetched_at REAL, places INTEGER,
+                    failures INTEGER DEFAULT 0, retry_after REAL,
+                    PRIMARY KEY (city, source, keyword)
+                );
+                CREATE TABLE IF NOT EXISTS city_versions (
+                    city_id TEXT PRIMARY KEY, version INTEGER, changed_at REAL
+                );
+            """)
+            self._migrate(conn)
+            conn.commit()
+            self._ready = True  # 스키마 / 마이그레이션이 끝난 뒤에만 (실패하면 다음 호출 때 다시 시도)
+
+    def _migrate(self, conn):
+        # 예전 DB 파일에 없는 열을 추가하고, 비어 있는 행은 한 번 채워 넣습니다.
+        existing = {r[1] for r in conn.execute("PRAGMA table_info(places)")}
+        for col, col_type in DERIVED_COLUMNS.items():
+            if col not in existing:
+                conn.execute(f"ALTER TABLE places ADD COLUMN {col} {col_type}")
+        changed = set()  # 데이터 버전을 올려야 하는 도시
+        rows = conn.execute("SELECT id, name, category, city_id FROM places WHERE bucket IS NULL").fetchall()
+        if rows:
+            updates = []
+            for r in rows:
+                place = place_classifier.classify({"name": r[1], "category": r[2]})
+                updates.append((place['bucket'], place['style_tags'], r[0]))
+                changed.add(r[3])
+            conn.executemany("UPDATE places SET bucket=?, style_tags=? WHERE id=?", updates)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_places_city_id ON places(city_id)")
+        # 예전 구글 사진 주소(API 키가 들어 있음)는 지움 -> 다음 수집 때 키 없는 gphoto: 참조로 다시 채워짐
+        # (예전 photoreference는 새 Places API 사진 이름으로 바꿀 수 없음)
+        legacy = conn.execute("SELECT DISTINCT city_id FROM places WHERE img_url LIKE ? AND img_url LIKE '%key=%'",
+                              (LEGACY_PHOTO_PATTERN,)).fetchall()
+        if legacy:
+            changed.update(r[0] for r in legacy)
+            conn.execute("UPDATE places SET img_url='' WHERE img_url LIKE ? AND img_url LIKE '%key=%'", (LEGACY_PHOTO_PATTERN,))
+        # 표준 도시 ID 채우기: 도시 이름 종류만큼만 계산 (정규화 표가 바뀌면 달라진 도시만 다시 씀)
+        for (city,) in conn.execute("SELECT DISTINCT city FROM places").fetchall():
+            cid = cities.city_id(city)
+            moved = conn.execute("SELECT DISTINCT city_id FROM places WHERE city=? AND city_id IS NOT ?", (city, cid)).fetchall()
+            if moved:
+                changed.update([cid] + [r[0] for r in moved])
+                conn.execute("UPDATE places SET city_id=? WHERE city=? AND city_id IS NOT ?", (cid, city, cid))
+        # 도시별 데이터 버전: 처음 만들 때 한 번만 지금 있는 도시로 채움
+        if conn.execute("SELECT 1 FROM city_versions LIMIT 1").fetchone() is None:
+            conn.execute("INSERT INTO city_versions SELECT city_id, 1, ? FROM places WHERE city_id IS NOT NULL GROUP BY city_id", (time.time(),))
+        else:
+            self._bump_versions(conn, changed)
+        # 수집 기록: 실패 기록 열 추가 + 아마데우스 좌표 키워드를 고정 값으로
+        existing = {r[1] for r in conn.execute("PRAGMA table_info(fetch_log)")}
+        for col, col_type in {"failures": "INTEGER DEFAULT 0", "retry_after": "REAL"}.items():
+            if col not in existing:
+                conn.execute(f"ALTER TABLE fetch_log ADD COLUMN {col} {col_type}")
+        conn.execute("UPDATE OR REPLACE fetch_log SET keyword=? WHERE source='amadeus' AND keyword != ?", (AMADEUS_KEYWORD, AMADEUS_KEYWORD))
+        # 수집 기록도 표준 도시 ID 기준으로 ("제주" / "제주도"로 따로 수집하지 않도록)
+        for (city,) in conn.execute("SELECT DISTINCT city FROM fetch_log").fetchall():
+            if cities.city_id(city) != city:
+                conn.execute("UPDATE OR REPLACE fetch_log SET city=? WHERE city=?", (cities.city_id(city), city))
+        # 관광공사 요청은 도시 이름이 키워드라 표준 도시 ID로 기록 ("제주" / "제주도"가 TTL / 재시도 대기를 따로 갖지 않도록)
+        conn.execute("UPDATE OR REPLACE fetch_log SET keyword=city WHERE source='tourapi' AND keyword != city")
+
+    def upsert_many(self, places):
+        """
+        없는 ID는 추가하고, 있는 ID는 값(평점, 이미지 등)이 바뀐 경우에만 수정합니다.
+        바뀌지 않은 행은 건드리지 않으므로 updated_at(데이터 버전)도 그대로 유지됩니다.
+        도시(city / city_id)는 처음 저장한 값을 유지합니다.
+        """
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "failed": 0}
+        rows = []
+        for data in places:
+            try:
+                if not data.get('bucket'): place_classifier.classify(data)
+                rows.append(_to_row(data) + [data['bucket'], data['style_tags'], cities.city_id(data['city'])])
+            except (KeyError, TypeError, ValueError): stats['failed'] += 1
+        if not rows: return stats
+
+        conn = self._conn()
+        ids = [r[0] for r in rows]
+        existing = {}
+        delta_cols = ", ".join(DELTA_COLUMNS)
+        for i in range(0, len(ids), 500):  # SQLite 변수 개수 제한 대비
+            chunk = ids[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for r in conn.execute(f"SELECT id, city_id, {delta_cols} FROM places WHERE id IN ({marks})", chunk):
+                existing[r[0]] = (r[1], tuple(r[2:]))
+
+        positions = [STORE_COLUMNS.index(c) for c in DELTA_COLUMNS]
+        changed, changed_cities = [], set()
+        for row in rows:
+            old = existing.get(row[0])
+            if old is None:
+                stats['inserted'] += 1
+                changed_cities.add(row[-1])
+            elif old[1] == tuple(row[i] for i in positions):
+                stats['unchanged'] += 1
+                continue
+            else:
+                stats['updated'] += 1
+                changed_cities.add(old[0])  # 수정된 행은 처음 저장한 도시에 남음
+            changed.append(row)
+        if not changed: return stats
+
+        cols = ", ".join(STORE_COLUMNS)
+        marks = ", ".join("?" * len(STORE_COLUMNS))
+        updates = ", ".join(f"{c}=excluded.{c}" for c in STORE_COLUMNS[1:] if c not in KEEP_COLUMNS)
+        with conn:
+            conn.executemany(f"INSERT INTO places ({cols}) VALUES ({marks}) "
+                             f"ON CONFLICT(id) DO UPDATE SET {updates}", changed)
+            self._bump_versions(conn, changed_cities)
+        return stats
+
+    def _bump_versions(self, conn, city_ids):
+        """바뀐 도시의 데이터 버전 올리기 (장소를 쓰는 트랜잭션 안에서 같이 호출)"""
+        now = time.time()
+        conn.executemany("INSERT INTO city_versions VALUES (?, 1, ?) "
+                         "ON CONFLICT(city_id) DO UPDATE SET version = version + 1, changed_at = excluded.changed_at",
+                         [(cid, now) for cid in city_ids if cid])
+
+    def query(self, city, category_filter=None, limit=None):
+        """도시 장소 조회 -> PlaceView (메모리 색인의 열 배열을 가리키는 평점순 뷰)"""
+        with diagnostics.span("db.query") as info:
+            rows = self._query(city, category_filter, limit)
+            info['rows'] = len(rows)
+        diagnostics.count("db.calls")
+        return rows
+
+    def _query(self, city, category_filter, limit):
+        # 표준 도시 ID로 정확히 찾습니다. ("광주"가 "경기 광주"까지 끌어오지 않음)
+        cid = cities.city_id(city)
+        version = self._version(cid)
+        city_places = self._index.get(cid, version)
+        if city_places is None:
+            with diagnostics.span("db.load_city") as info:
+                cursor = self._conn().execute("SELECT * FROM places WHERE city_id = ? ORDER BY rating DESC, rowid", (cid,))
+                rows = cursor.fetchall()
+                columns = [d[0] for d in cursor.description]
+                info['rows'] = len(rows)
+            city_places = self._index.put(cid, version, place_index.CityPlaces(columns, rows))
+        return city_places.select(category_filter, limit)
+
+    def version(self, city):
+        """도시 데이터 버전 (변경 횟수 + 마지막 변경 시각). 장소가 추가/수정될 때마다 바뀝니다."""
+        diagnostics.count("db.calls")
+        return self._version(cities.city_id(city))
+
+    def _version(self, cid):
+        # 도시 전체를 세지 않고 city_versions 한 행만 읽음 (upsert_many가 올려 둔 값)
+        row = self._conn().execute("SELECT version, changed_at FROM city_versions WHERE city_id = ?", (cid,)).fetchone()
+        return f"{row[0]}:{row[1]}" if row else "0:"
+
+    def fetch_times(self, city):
+        """(제공자, 키워드) -> (마지막으로 성공한 수집 시각, 실패 후 다시 시도할 시각). 없으면 None (epoch 초)"""
+        rows = self._conn().execute("SELECT source, keyword, fetched_at, retry_after FROM fetch_log WHERE city = ?", (cities.city_id(city),))
+        return {(r[0], r[1]): (r[2], r[3]) for r in rows}
+
+    def mark_fetched(self, entries):
+        """entries: [(city, source, keyword, 받은 장소 수)]. 성공하면 실패 기록은 지웁니다."""
+        if not entries: return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO fetch_log (city, source, keyword, fetched_at, places, failures, retry_after) "
+                             "VALUES (?, ?, ?, ?, ?, 0, NULL)",
+                             [(cities.city_id(c), s, str(k), now, n) for c, s, k, n in entries])
+
+    def mark_failed(self, entries):
+        """entries: [(city, source, keyword)]. 마지막 성공 시각은 그대로 두고 재시도 시각만 뒤로 미룹니다."""
+        if not entries: return
+        now = time.time()
+        conn = self._conn()
+        with conn:
+            # 연속 실패 n번째 -> FETCH_RETRY_BASE * 2^(n-1) 뒤에 재시도 (최대 FETCH_TTL)
+            conn.executemany("INSERT INTO fetch_log (city, source, keyword, failures, retry_after) VALUES (?, ?, ?, 1, ?) "
+                             "ON CONFLICT(city, source, keyword) DO UPDATE SET failures = failures + 1, "
+                             "retry_after = ? + MIN(?, ? * (1 << MIN(failures, 10)))",
+                             [(cities.city_id(c), s, str(k), now + FETCH_RETRY_BASE, now, FETCH_TTL, FETCH_RETRY_BASE)
+                              for c, s, k in entries])
+
+class SheetPlaceStore:
+    """구글 시트 저장소 (내보내기/동기화 용도)"""
+
+    def upsert_many(self, places):
+        # 구글 시트 API 제한 때문에 기존 행 수정은 하지 않고 '없는 것만 추가'합니다.
+        stats = {"inserted": 0, "updated": 0, "failed": 0}
+        sheet = get_sheet()
+        # 전체 레코드 대신 ID 열만 한 번 읽어옵니다. (첫 행은 헤더)
+        existing_ids = set(str(v) for v in sheet.col_values(1)[1:])
+        diagnostics.count("sheet.calls")
+        rows = []
+        for data in places:
+            place_id = str(data.get('id', ''))
+            if not place_id or place_id in existing_ids: continue
+            try:
+                rows.append(_to_row(data))
+                existing_ids.add(place_id)
+            except (KeyError, TypeError, ValueError):
+                stats['failed'] += 1
+        if rows:
+            with diagnostics.span("sheet.append_rows", rows=len(rows)):
+                sheet.append_rows(rows)
+            diagnostics.count("sheet.calls")
+        stats['inserted'] = len(rows)
+        return stats
+
+    def query(self, city, category_filter=None, limit=None):
+        with diagnostics.span("sheet.get_all_records") as info:
+            records = get_sheet().get_all_records()
+            info['rows'] = len(records)
+        diagnostics.count("sheet.calls")
+        with diagnostics.span("sheet.filter") as info:
+            # 표준 도시 ID로 정확히 비교 (부분 문자열 검색 X)
+            cid = cities.city_id(city)
+            rows = [r for r in records if cities.city_id(r.get('city', '')) == cid]
+            if category_filter:
+                cats = {category_filter} if isinstance(category_filter, str) else set(category_filter)
+                rows = [r for r in rows if r.get('category') in cats]
+            if limit:
+                rows = sorted(rows, key=lambda r: float(r.get('rating') or 0), reverse=True)[:limit]
+            info['rows'] = len(rows)
+            return rows
+
+_store = SQLitePlaceStore()
+
+def get_store():
+    return _store
+
+# DB 초기화 (SQLite 테이블/인덱스 생성)
 def init_db():
-    pass 
+    get_store().init()
+
+# 구글 시트에 쌓여 있던 데이터를 SQLite로 한 번에 가져오기 (최초 이전용)
+def import_from_sheet():
+    records = get_sheet().get_all_records()
+    return get_store().upsert_many(records)
+
+# 저장 형식(한 행)으로 변환
+def _to_row(data):
+    return [
+        str(data['id']), data['source'], data['name'], data['city'], data['category'],
+        float(data['lat']), float(data['lng']), data['address'], float(data['rating']),
+        data['img_url'], data.get('desc', ''), str(datetime.now())
+    ]
+
+# 데이터 저장: buffer가 주어지면 쌓아두기만 하고(Write-behind), 없으면 바로 저장
+def save_place(data, buffer=None):
+    if buffer is not None:
+        buffer.append(data)
+        return None
+    return flush_places([data])
+
+# 버퍼 일괄 저장: 배치 안 중복 ID 제거 후 SQLite에 한 번에 upsert (+ 시트 내보내기)
+def flush_places(buffer):
+    stats = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0, "failed": 0, "elapsed": 0.0}
+    if not buffer: return stats
+    started = time.perf_counter()
+
+    unique, seen = [], set()
+    for data in buffer:
+        place_id = str(data.get('id', ''))
+        if not place_id or place_id in seen:
+            stats['skipped'] += 1
+            continue
+        seen.add(place_id)
+        unique.append(data)
 
-# 데이터 저장 (Upsert 구현: ID가 있으면 수정, 없으면 추가)
-def save_place(data):
     try:
-        sheet = get_sheet()
-        # 모든 데이터 가져오기 (ID 확인용)
-        records = sheet.get_all_records()
-        df = pd.DataFrame(records)
-        
-        # 데이터 준비
-        row_data = [
-            str(data['id']), data['source'], data['name'], data['city'], data['category'],
-            float(data['lat']), float(data['lng']), data['address'], float(data['rating']),
-            data['img_url'], data.get('desc', ''), str(datetime.now())
-        ]
-
-        # 이미 존재하는 ID인지 확인
-        if not df.empty and str(data['id']) in df['id'].astype(str).values:
-            # 존재하면 업데이트 (행 찾아서 덮어쓰기 - API 호출 줄이려고 일단 생략하거나 append만 해도 됨)
-            # 구글 시트 API 제한 때문에, 여기서는 간단하게 '없는 것만 추가'로 구현합니다.
-            pass 
-        else:
-            # 없으면 추가
-            sheet.append_row(row_data)
-            print(f"💾 구글시트 저장: {data['name']}")
-            
+        with diagnostics.span("db.upsert", rows=len(unique)):
+            result = get_store().upsert_many(unique)
+        for k in ("inserted", "updated", "unchanged", "failed"): stats[k] = result[k]
     except Exception as e:
-        print(f"❌ 구글시트 저장 실패: {e}")
+        stats['failed'] = len(unique)
+        stats['error'] = str(e)
+        print(f"❌ DB 저장 실패: {e}")
 
-# --- [API 호출 함수들] (기존과 로직 동일, save_place만 바뀜) ---
-def fetch_google(city, keywords):
-    if not MY_GOOGLE_KEY: return
-    gmaps = googlemaps.Client(key=MY_GOOGLE_KEY)
-    for keyword in keywords:
-        try:
-            res = gmaps.places(query=f"{city} {keyword}")
-            for p in res.get('results', []):
-                img = ""
-                if 'photos' in p:
-                    ref = p['photos'][0]['photo_reference']
-                    img = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={ref}&key={MY_GOOGLE_KEY}"
-                save_place({"id": f"google_{p['place_id']}", "source": "google", "name": p['name'], "city": city,
-                            "category": p.get('types',['place'])[0], "lat": p['geometry']['location']['lat'],
-                            "lng": p['geometry']['location']['lng'], "address": p.get('formatted_address',''),
-                            "rating": p.get('rating',0.0), "img_url": img, "desc": "Google"})
-        except: pass
-
-def fetch_kakao(city, keywords):
-    if not MY_KAKAO_KEY: return
-    headers = {"Authorization": f"KakaoAK {MY_KAKAO_KEY}"}
-    for keyword in keywords:
+    if SHEET_SYNC:
+        try: stats['sheet_inserted'] = SheetPlaceStore().upsert_many(unique)['inserted']
+        except Exception as e:
+            reset_sheet()  # 끊긴 연결을 계속 쓰지 않도록 다음 호출 때 새로 연결
+            print(f"❌ 구글시트 내보내기 실패: {e}")
+
+    stats['elapsed'] = round(time.perf_counter() - started, 3)
+    print(f"💾 DB 저장: 추가 {stats['inserted']}건 / 수정 {stats['updated']}건 / 변경 없음 {stats['unchanged']}건 / 중복 {stats['skipped']}건 / 실패 {stats['failed']}건 ({stats['elapsed']}초)")
+    return stats
+
+# ==========================================
+# 🚀 동시 수집 엔진 (source, keyword) 요청을 스레드 풀에서 한꺼번에 처리
+# ==========================================
+REQUEST_TIMEOUT = 10   # 요청 하나당 최대 대기 시간(초)
+FETCH_WORKERS = 8      # 전체 동시 요청 수 상한
+
+# 제공자별 동시 요청 수 / 요청 간 최소 간격(초)
+PROVIDER_LIMITS = {
+    "google": {"concurrency": 4, "min_interval": 0.1},
+    "kakao": {"concurrency": 4, "min_interval": 0.05},
+    "tourapi": {"concurrency": 2, "min_interval": 0.2},
+    "amadeus": {"concurrency": 1, "min_interval": 0.5},
+}
+
+class _ProviderGate:
+    """제공자 하나의 동시성 제한 + 속도 제한 + keep-alive 세션 (세션은 첫 요청 때 생성)"""
+
+    def __init__(self, concurrency, min_interval):
+        self.semaphore = threading.BoundedSemaphore(concurrency)
+        self.concurrency = concurrency
+        self.min_interval = min_interval
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+        self._session = None
+
+    @property
+    def session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    import requests.adapters
+                    session = requests.Session()
+                    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def wait_turn(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.min_interval
+        if slot > now: time.sleep(slot - now)
+
+class _GateRegistry(dict):
+    """제공자 이름 -> _ProviderGate. 처음 찾는 제공자만 그때 만듭니다."""
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+
+    def __missing__(self, name):
+        with self._lock:
+            if name not in self:
+                self[name] = _ProviderGate(**PROVIDER_LIMITS[name])
+            return dict.__getitem__(self, name)
+
+_gates = _GateRegistry()
+_gmaps_client = None
+_amadeus_token = {"value": None, "expires": 0.0}
+_amadeus_lock = threading.Lock()
+
+# googlemaps 클라이언트도 한 번만 만들어 세션을 재사용합니다.
+def get_gmaps():
+    global _gmaps_client
+    if _gmaps_client is None:
+        import googlemaps
+        _gmaps_client = googlemaps.Client(key=MY_GOOGLE_KEY, timeout=REQUEST_TIMEOUT,
+                                          requests_session=_gates["google"].session)
+    return _gmaps_client
+
+def _get_amadeus_token():
+    with _amadeus_lock:
+        if _amadeus_token["value"] and time.time() < _amadeus_token["expires"]:
+            return _amadeus_token["value"]
+        res = _gates["amadeus"].session.post(
+            "https://test.api.amadeus.com/v1/security/oauth2/token",
+            data={"grant_type": "client_credentials", "client_id": MY_AMADEUS_ID, "client_secret": MY_AMADEUS_SECRET},
+            timeout=REQUEST_TIMEOUT)
+        res.raise_for_status()
+        body = res.json()
+        _amadeus_token["value"] = body["access_token"]
+        _amadeus_token["expires"] = time.time() + int(body.get("expires_in", 1799)) - 60
+        return _amadeus_token["value"]
+
+# --- [API 호출 함수들] 요청 1건 = 장소 리스트 반환 (실패 시 예외) ---
+# 구글 Places API (New): 저장하는 필드만 요청 (필드 마스크에 따라 과금 등급이 정해짐)
+GOOGLE_PLACES_URL = "https://places.googleapis.com/v1"
+GOOGLE_FIELD_MASK = ",".join([
+    "places.id", "places.displayName", "places.primaryType", "places.types", "places.location",
+    "places.formattedAddress", "places.rating", "places.photos", "nextPageToken",
+])
+GOOGLE_MAX_PAGES = int(os.environ.get("GOOGLE_MAX_PAGES", 3))  # 키워드당 최대 페이지 수 (페이지당 20개)
+GOOGLE_PHOTO_WIDTH = 400
+GOOGLE_PHOTO_PREFIX = "gphoto:"  # img_url에 저장하는 사진 참조: "gphoto:places/<id>/photos/<ref>"
+
+def _google_photo(ref):
+    """
+    이미지 캐시 참조 -> 키 없는 사진 주소(photoUri).
+    수집 때는 사진 이름만 저장하고, 화면에 처음 보일 때 이 함수로 한 번만 받습니다. (보이는 사진만 과금)
+    """
+    if not MY_GOOGLE_KEY: raise RuntimeError("구글 API 키 없음")
+    diagnostics.count("api.google_photo")
+    gate = _gates["google"]
+    with gate.semaphore:  # 장소 검색과 같은 동시성 / 요청 간격 제한을 따름
+        gate.wait_turn()
+        # skipHttpRedirect=true: 이미지 대신 키 없는 photoUri(JSON)를 받음 (이미지는 이미지 캐시가 슬롯 밖에서 받음)
+        res = gate.session.get(f"{GOOGLE_PLACES_URL}/{ref[len(GOOGLE_PHOTO_PREFIX):]}/media",
+                               params={"maxWidthPx": GOOGLE_PHOTO_WIDTH, "skipHttpRedirect": "true", "key": MY_GOOGLE_KEY},
+                               timeout=REQUEST_TIMEOUT)
+        res.raise_for_status()
+        return res.json()['photoUri']
+
+image_cache.register_resolver(GOOGLE_PHOTO_PREFIX, _google_photo)
+
+def _search_google(task):
+    city = task['city']
+    gate = _gates["google"]
+    headers = {"X-Goog-Api-Key": MY_GOOGLE_KEY, "X-Goog-FieldMask": GOOGLE_FIELD_MASK}
+    body = {"textQuery": f"{city} {task['keyword']}", "languageCode": "ko", "pageSize": 20}
+    places = []
+    for page in range(GOOGLE_MAX_PAGES):
+        if page: gate.wait_turn()  # 다음 페이지도 제공자 요청 간격을 지킵니다.
+        res = gate.session.post(f"{GOOGLE_PLACES_URL}/places:searchText", headers=headers, json=body, timeout=REQUEST_TIMEOUT)
+        res.raise_for_status()
+        data = res.json()
+        for p in data.get('places', []):
+            img = GOOGLE_PHOTO_PREFIX + p['photos'][0]['name'] if p.get('photos') else ""
+            places.append({"id": f"google_{p['id']}", "source": "google", "name": p.get('displayName', {}).get('text', ''),
+                           "city": city, "category": p.get('primaryType') or (p.get('types') or ['place'])[0],
+                           "lat": p['location']['latitude'], "lng": p['location']['longitude'],
+                           "address": p.get('formattedAddress', ''), "rating": p.get('rating', 0.0),
+                           "img_url": img, "desc": "Google"})
+        if not data.get('nextPageToken'): break
+        body['pageToken'] = data['nextPageToken']
+    return places
+
+def _search_kakao(task):
+    city = task['city']
+    res = _gates["kakao"].session.get("https://dapi.kakao.com/v2/local/search/keyword.json",
+                                      headers={"Authorization": f"KakaoAK {MY_KAKAO_KEY}"},
+                                      params={"query": f"{city} {task['keyword']}", "size": 15}, timeout=REQUEST_TIMEOUT)
+    res.raise_for_status()
+    return [{"id": f"kakao_{p['id']}", "source": "kakao", "name": p['place_name'], "city": city,
+             "category": p['category_name'].split(">")[-1].strip(), "lat": float(p['y']), "lng": float(p['x']),
+             "address": p['road_address_name'], "rating": 0.0, "img_url": p['place_url'], "desc": p['phone']}
+            for p in res.json().get('documents', [])]
+
+def _search_tourapi(task):
+    city = task['city']
+    res = _gates["tourapi"].session.get("http://apis.data.go.kr/B551011/KorService1/searchKeyword1",
+                                        params={"serviceKey": unquote(MY_TOUR_KEY), "numOfRows": 20, "MobileOS": "ETC", "MobileApp": "PicknGo", "_type": "json", "keyword": city, "contentTypeId": 12},
+                                        timeout=REQUEST_TIMEOUT)
+    res.raise_for_status()
+    return [{"id": f"tour_{p['contentid']}", "source": "tourapi", "name": p['title'], "city": city,
+             "category": "관광지", "lat": float(p.get('mapy',0)), "lng": float(p.get('mapx',0)),
+             "address": p.get('addr1',''), "rating": 4.5, "img_url": p.get('firstimage',''), "desc": "TourAPI"}
+            for p in res.json()['response']['body']['items']['item']]
+
+def _search_amadeus(task):
+    city = task['city']
+    res = _gates["amadeus"].session.get("https://test.api.amadeus.com/v1/reference-data/locations/pois",
+                                        headers={"Authorization": f"Bearer {_get_amadeus_token()}"},
+                                        params={"latitude": task['lat'], "longitude": task['lng'], "radius": 5},
+                                        timeout=REQUEST_TIMEOUT)
+    res.raise_for_status()
+    return [{"id": f"amadeus_{p['id']}", "source": "amadeus", "name": p['name'], "city": city,
+             "category": p['category'], "lat": float(p['geoCode']['latitude']), "lng": float(p['geoCode']['longitude']),
+             "address": city, "rating": 4.0, "img_url": "", "desc": "Amadeus"}
+            for p in res.json().get('data', [])]
+
+# 제공자 이름 -> (요청 함수, 키 확인 함수)
+PROVIDERS = {
+    "google": (_search_google, lambda: bool(MY_GOOGLE_KEY)),
+    "kakao": (_search_kakao, lambda: bool(MY_KAKAO_KEY)),
+    "tourapi": (_search_tourapi, lambda: bool(MY_TOUR_KEY)),
+    "amadeus": (_search_amadeus, lambda: bool(MY_AMADEUS_ID)),
+}
+
+def provider_enabled(source):
+    return source in PROVIDERS and PROVIDERS[source][1]()
+
+def _run_task(task):
+    diagnostics.count(f"api.{task['source']}")
+    gate = _gates[task['source']]
+    with gate.semaphore:
+        gate.wait_turn()
+        started = time.perf_counter()
         try:
-            res = requests.get("https://dapi.kakao.com/v2/local/search/keyword.json", headers=headers, params={"query": f"{city} {keyword}", "size": 15})
-            for p in res.json().get('documents', []):
-                save_place({"id": f"kakao_{p['id']}", "source": "kakao", "name": p['place_name'], "city": city,
-                            "category": p['category_name'].split(">")[-1].strip(), "lat": float(p['y']), "lng": float(p['x']),
-                            "address": p['road_address_name'], "rating": 0.0, "img_url": p['place_url'], "desc": p['phone']})
-        except: pass
-
-def fetch_tourapi(city):
-    if not MY_TOUR_KEY: return
-    try:
-        res = requests.get("http://apis.data.go.kr/B551011/KorService1/searchKeyword1", 
-                           params={"serviceKey": unquote(MY_TOUR_KEY), "numOfRows": 20, "MobileOS": "ETC", "MobileApp": "PicknGo", "_type": "json", "keyword": city, "contentTypeId": 12})
-        for p in res.json()['response']['body']['items']['item']:
-            save_place({"id": f"tour_{p['contentid']}", "source": "tourapi", "name": p['title'], "city": city,
-                        "category": "관광지", "lat": float(p.get('mapy',0)), "lng": float(p.get('mapx',0)),
-                        "address": p.get('addr1',''), "rating": 4.5, "img_url": p.get('firstimage',''), "desc": "TourAPI"})
-    except: pass
-
-def fetch_amadeus(city, lat, lng):
-    if not MY_AMADEUS_ID: return
-    try:
-        token = requests.post("https://test.api.amadeus.com/v1/security/oauth2/token", data={"grant_type": "client_credentials", "client_id": MY_AMADEUS_ID, "client_secret": MY_AMADEUS_SECRET}).json().get('access_token')
-        res = requests.get("https://test.api.amadeus.com/v1/reference-data/locations/pois", headers={"Authorization": f"Bearer {token}"}, params={"latitude": lat, "longitude": lng, "radius": 5})
-        for p in res.json().get('data', []):
-            save_place({"id": f"amadeus_{p['id']}", "source": "amadeus", "name": p['name'], "city": city,
-                        "category": p['category'], "lat": float(p['geoCode']['latitude']), "lng": float(p['geoCode']['longitude']),
-                        "address": city, "rating": 4.0, "img_url": "", "desc": "Amadeus"})
-    except: pass
+            return PROVIDERS[task['source']][0](task), None, time.perf_counter() - started
+        except Exception as e:
+            return [], e, time.perf_counter() - started
+
+def run_fetch_tasks(tasks, buffer, done=None, progress=None, failed=None):
+    """
+    tasks: [{"source": "google", "city": ..., "keyword": ...}, ...]
+    모든 요청을 동시에 실행하고 결과는 buffer에 모읍니다.
+    done이 주어지면 성공한 요청을 (도시, 제공자, 키워드, 장소 수)로 추가합니다.
+    failed가 주어지면 실패한 요청을 (도시, 제공자, 키워드)로 추가합니다.
+    progress(끝난 요청 수, 전체 요청 수, 받은 장소 수)는 요청이 하나 끝날 때마다 호출됩니다.
+    반환값: 제공자별 {"requests", "errors", "places", "elapsed", "messages"}
+    """
+    report = {}
+    tasks = [t for t in tasks if provider_enabled(t['source'])]
+    for t in tasks:
+        report.setdefault(t['source'], {"requests": 0, "errors": 0, "places": 0, "elapsed": 0.0, "messages": []})
+    if not tasks: return report
+
+    finished, received = 0, 0
+    if progress is not None: progress(0, len(tasks), 0)
+    with ThreadPoolExecutor(max_workers=min(FETCH_WORKERS, len(tasks))) as pool:
+        # 계측 중이면 작업 스레드에서도 같은 실행에 기록되도록 컨텍스트를 넘깁니다.
+        futures = {pool.submit(contextvars.copy_context().run, _run_task, t): t for t in tasks}
+        for future in as_completed(futures):
+            task = futures[future]
+            places, error, elapsed = future.result()
+            finished += 1
+            r = report[task['source']]
+            r['requests'] += 1
+            r['elapsed'] = round(r['elapsed'] + elapsed, 3)
+            if error is not None:
+                r['errors'] += 1
+                if len(r['messages']) < 5: r['messages'].append(f"{task.get('keyword', '')}: {error}")
+                print(f"❌ {task['source']} 수집 실패 ({task.get('keyword', '')}): {error}")
+                if failed is not None: failed.append((task['city'], task['source'], task.get('keyword', '')))
+            else:
+                r['places'] += len(places)
+                received += len(places)
+                buffer.extend(places)
+                if done is not None: done.append((task['city'], task['source'], task.get('keyword', ''), len(places)))
+            if progress is not None: progress(finished, len(tasks), received)
+    return report
+
+def _fetch(tasks, buffer, progress=None):
+    places = [] if buffer is None else buffer
+    done, failed = [], []
+    report = run_fetch_tasks(tasks, places, done, progress, failed)
+    if buffer is None:
+        stats = flush_places(places)
+        stats['sources'] = report
+        # 저장까지 끝난 요청만 '최신'으로 기록 (저장 실패 시 실패로 기록하고 잠시 뒤 다시 수집)
+        if 'error' not in stats: record_fetches(done)
+        else: failed += [entry[:3] for entry in done]
+        record_failures(failed)
+        return stats
+    return report
+
+# 개별 수집기 (buffer가 없으면 바로 저장)
+def fetch_google(city, keywords, buffer=None):
+    return _fetch([{"source": "google", "city": city, "keyword": k} for k in keywords], buffer)
+
+def fetch_kakao(city, keywords, buffer=None):
+    return _fetch([{"source": "kakao", "city": city, "keyword": k} for k in keywords], buffer)
+
+def fetch_tourapi(city, buffer=None):
+    return _fetch([{"source": "tourapi", "city": city, "keyword": cities.city_id(city)}], buffer)
+
+def fetch_amadeus(city, lat, lng, buffer=None):
+    return _fetch([{"source": "amadeus", "city": city, "keyword": AMADEUS_KEYWORD, "lat": lat, "lng": lng}], buffer)
+
+# 이미 짜여진 요청 목록(수집 계획)을 실행하고 한 번에 저장
+def run_fetch_plan(tasks, progress=None):
+    return _fetch(tasks, None, progress)
 
 def fetch_all_data(city, keywords, api_keys=None, lat=0, lng=0, is_domestic=True):
-    fetch_google(city, keywords)
+    # 모든 (제공자, 키워드) 요청을 한 번에 동시 실행하고, 결과는 마지막에 한 번만 저장합니다.
+    tasks = [{"source": "google", "city": city, "keyword": k} for k in keywords]
     if is_domestic:
-        fetch_kakao(city, keywords)
-        if "관광" in str(keywords): fetch_tourapi(city)
+        tasks += [{"source": "kakao", "city": city, "keyword": k} for k in keywords]
+        if "관광" in str(keywords): tasks.append({"source": "tourapi", "city": city, "keyword": cities.city_id(city)})
     else:
-        if lat != 0: fetch_amadeus(city, lat, lng)
+        if lat != 0: tasks.append({"source": "amadeus", "city": city, "keyword": AMADEUS_KEYWORD, "lat": lat, "lng": lng})
+    return _fetch(tasks, None)
 
-# 데이터를 구글 시트에서 한 번에 긁어오는 함수
+# 도시별 장소 조회 -> 평점순 dict 목록 (json.dumps / + / 수정 모두 가능한 보통 list)
 def get_places(city, category_filter=None, limit=50):
+    return list(get_place_view(city, category_filter, limit))
+
+# 같은 조회를 복사 없이: SQLite면 열 배열을 가리키는 읽기 전용 PlaceView, 시트면 dict 목록
+# (len / 인덱스 / for 만 쓰는 내부 계산용. 일정 생성의 중복 제거가 열 단위로 씁니다)
+def get_place_view(city, category_filter=None, limit=50):
     try:
-        sheet = get_sheet()
-        records = sheet.get_all_records()
-        df = pd.DataFrame(records)
-        
-        if df.empty: return []
-        
-        # 도시 필터링
-        filtered_df = df[df['city'].astype(str).str.contains(city)]
-        
-        # 리스트 딕셔너리로 변환
-        return filtered_df.to_dict('records')
+        return get_store().query(city, category_filter, limit)
     except Exception as e:
-        print(f"시트 읽기 오류: {e}")
+        print(f"DB 읽기 오류: {e}")
         return []
 
-# --- [backend.py 맨 아래에 추가] ---
+# 수집 기록: (도시, 제공자, 키워드)별 (마지막 성공 시각, 재시도 시각)
+def get_fetch_times(city):
+    try:
+        return get_store().fetch_times(city)
+    except Exception as e:
+        print(f"DB 읽기 오류: {e}")
+        return {}
 
-def get_real_duration_kakao(origin_lat, origin_lng, dest_lat, dest_lng):
+def record_fetches(entries):
+    try:
+        get_store().mark_fetched(entries)
+    except Exception as e:
+        print(f"❌ 수집 기록 저장 실패: {e}")
+
+def record_failures(entries):
+    try:
+        get_store().mark_failed(entries)
+    except Exception as e:
+        print(f"❌ 수집 실패 기록 저장 실패: {e}")
+
+# 도시 데이터 버전: 캐시된 후보군이 아직 유효한지 확인할 때 사용
+def get_data_version(city):
+    try:
+        return get_store().version(city)
+    except Exception as e:
+        print(f"DB 읽기 오류: {e}")
+        return None
+
+# 도시 중심 좌표: 저장된 장소들의 평균 좌표, 없으면 구글 지오코딩 (geocode=False면 저장된 좌표만, 외부 요청 없음)
+def get_city_center(city, geocode=True):
+    try:
+        row = get_store()._conn().execute(
+            "SELECT AVG(lat), AVG(lng) FROM places WHERE city_id = ? AND lat != 0 AND lng != 0", (cities.city_id(city),)).fetchone()
+        if row and row[0] is not None: return float(row[0]), float(row[1])
+    except Exception as e:
+        print(f"DB 읽기 오류: {e}")
+
+    if not geocode or not MY_GOOGLE_KEY: return 0, 0
+    try:
+        diagnostics.count("api.google_geocode")
+        res = get_gmaps().geocode(city)
+        loc = res[0]['geometry']['location']
+        return loc['lat'], loc['lng']
+    except Exception as e:
+        print(f"지오코딩 실패: {e}")
+        return 0, 0
+
+# ==========================================
+# 🚗 이동 시간 캐시 (좌표 반올림 + 이동수단 기준, 디스크 저장 / TTL / LRU)
+# ==========================================
+TRAVEL_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "travel_cache.db")
+TRAVEL_TIME_TTL = 7 * 24 * 3600   # 캐시 유효 기간(초)
+TRAVEL_CACHE_MAX_ROWS = 50000     # 초과하면 오래 안 쓴 것부터 삭제
+COORD_PRECISION = 4               # 소수점 4자리 ≈ 11m
+MATRIX_MAX_SIDE = 25              # Distance Matrix 요청당 출발지/도착지 최대 개수
+MATRIX_MAX_ELEMENTS = 100         # Distance Matrix 요청당 (출발지 x 도착지) 최대 개수
+NO_ROUTE = 999999                 # 조회 실패 시 반환값 (기존과 동일)
+TRAVEL_CACHE_CHUNK = 200          # 캐시 조회 한 번에 묶는 쌍 개수 (SQL 변수 4개씩)
+
+class TravelTimeCache:
+    def __init__(self, path=TRAVEL_CACHE_PATH):
+        self.path = path
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS travel_times (
+                    provider TEXT, mode TEXT, o_lat REAL, o_lng REAL, d_lat REAL, d_lng REAL,
+                    seconds INTEGER, fetched_at REAL, last_used REAL,
+                    PRIMARY KEY (provider, mode, o_lat, o_lng, d_lat, d_lng)
+                );
+                CREATE INDEX IF NOT EXISTS idx_travel_times_used ON travel_times(last_used);
+            """)
+            self._local.conn = conn
+        return conn
+
+    def get_many(self, provider, mode, pairs):
+        """pairs: [((o_lat, o_lng), (d_lat, d_lng)), ...] (반올림된 좌표) -> {pair: seconds}"""
+        conn = self._conn()
+        now = time.time()
+        found = {}
+        pairs = list(pairs)
+        # 쌍 하나씩 SELECT 하지 않고 TRAVEL_CACHE_CHUNK 개씩 IN (VALUES ...) 로 한 번에 조회
+        for i in range(0, len(pairs), TRAVEL_CACHE_CHUNK):
+            chunk = pairs[i:i + TRAVEL_CACHE_CHUNK]
+            rows = conn.execute(
+                "SELECT o_lat, o_lng, d_lat, d_lng, seconds FROM travel_times WHERE provider=? AND mode=? "
+                "AND fetched_at > ? AND (o_lat, o_lng, d_lat, d_lng) IN (VALUES "
+                + ", ".join(["(?, ?, ?, ?)"] * len(chunk)) + ")",
+                [provider, mode, now - TRAVEL_TIME_TTL] + [v for o, d in chunk for v in (*o, *d)]).fetchall()
+            for o_lat, o_lng, d_lat, d_lng, seconds in rows:
+                found[((o_lat, o_lng), (d_lat, d_lng))] = seconds
+        if found:
+            with conn:
+                conn.executemany("UPDATE travel_times SET last_used=? WHERE provider=? AND mode=? "
+                                 "AND o_lat=? AND o_lng=? AND d_lat=? AND d_lng=?",
+                                 [(now, provider, mode, *o, *d) for o, d in found])
+        return found
+
+    def put_many(self, provider, mode, values):
+        """values: {pair: seconds}"""
+        if not values: return
+        conn = self._conn()
+        now = time.time()
+        with conn:
+            conn.executemany("INSERT OR REPLACE INTO travel_times VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                             [(provider, mode, *o, *d, int(sec), now, now) for (o, d), sec in values.items()])
+            # 만료된 항목 정리 후, 용량을 넘으면 가장 오래 안 쓴 항목부터 삭제 (LRU)
+            conn.execute("DELETE FROM travel_times WHERE fetched_at < ?", (now - TRAVEL_TIME_TTL,))
+            overflow = conn.execute("SELECT COUNT(*) FROM travel_times").fetchone()[0] - TRAVEL_CACHE_MAX_ROWS
+            if overflow > 0:
+                conn.execute("DELETE FROM travel_times WHERE rowid IN "
+                             "(SELECT rowid FROM travel_times ORDER BY last_used LIMIT ?)", (overflow,))
+
+_travel_cache = TravelTimeCache()
+
+def _round_point(lat, lng):
+    return (round(float(lat), COORD_PRECISION), round(float(lng), COORD_PRECISION))
+
+def _google_matrix(pairs, mode):
     """
-    카카오 모빌리티 API를 사용하여 자동차 이동 시간을 초(seconds) 단위로 반환
+    빠진 쌍만 Distance Matrix 배치로 조회 -> {(o, d): seconds}
+    도착지 목록이 같은 출발지끼리 묶어 요청 제한(한 변 25, 100칸)에 맞게 나눕니다.
     """
-    if not MY_KAKAO_KEY: return 999999 # 키 없으면 무시
-    
-    url = "https://apis-navi.kakaomobility.com/v1/directions"
-    headers = {"Authorization": f"KakaoAK {MY_KAKAO_KEY}"}
-    
+    by_origin = {}
+    for o, d in pairs: by_origin.setdefault(o, []).append(d)
+    groups = {}
+    for o, dests in by_origin.items(): groups.setdefault(tuple(dests), []).append(o)
+
+    gate = _gates["google"]
+    result = {}
+    for destinations, origins in groups.items():
+        dest_step = min(MATRIX_MAX_SIDE, len(destinations), MATRIX_MAX_ELEMENTS)
+        origin_step = max(1, min(MATRIX_MAX_SIDE, MATRIX_MAX_ELEMENTS // dest_step))
+        for i in range(0, len(origins), origin_step):
+            o_chunk = origins[i:i + origin_step]
+            for j in range(0, len(destinations), dest_step):
+                d_chunk = list(destinations[j:j + dest_step])
+                with gate.semaphore:
+                    gate.wait_turn()
+                    diagnostics.count("api.google_distance_matrix")
+                    res = get_gmaps().distance_matrix(origins=o_chunk, destinations=d_chunk, mode=mode)
+                for oi, row in enumerate(res['rows']):
+                    for di, element in enumerate(row['elements']):
+                        if element.get('status') == 'OK':
+                            result[(o_chunk[oi], d_chunk[di])] = element['duration']['value']
+    return result
+
+def _kakao_duration(origin, dest):
     # 카카오 네비는 "경도(lng),위도(lat)" 순서로 입력받습니다.
-    params = {
-        "origin": f"{origin_lng},{origin_lat}",
-        "destination": f"{dest_lng},{dest_lat}",
-        "priority": "RECOMMEND" # 추천경로
-    }
-    
-    try:
-        res = requests.get(url, headers=headers, params=params)
-        data = res.json()
-        # duration은 초 단위
-        duration = data['routes'][0]['summary']['duration']
-        return duration
-    except:
-        return 999999 # 에러 시 아주 큰 값 반환
+    gate = _gates["kakao"]
+    with gate.semaphore:
+        gate.wait_turn()
+        diagnostics.count("api.kakao_directions")
+        res = gate.session.get("https://apis-navi.kakaomobility.com/v1/directions",
+                               headers={"Authorization": f"KakaoAK {MY_KAKAO_KEY}"},
+                               params={"origin": f"{origin[1]},{origin[0]}", "destination": f"{dest[1]},{dest[0]}",
+                                       "priority": "RECOMMEND"},  # 추천경로
+                               timeout=REQUEST_TIMEOUT)
+    # duration은 초 단위
+    return res.json()['routes'][0]['summary']['duration']
 
-# --- [backend.py 맨 아래에 추가] ---
+def _kakao_matrix(pairs):
+    # 카카오 길찾기는 행렬 API가 없어서 빠진 쌍만 동시에 조회합니다.
+    result = {}
+    with ThreadPoolExecutor(max_workers=PROVIDER_LIMITS["kakao"]["concurrency"]) as pool:
+        futures = {pool.submit(contextvars.copy_context().run, _kakao_duration, o, d): (o, d) for o, d in pairs}
+        for future in as_completed(futures):
+            try: result[futures[future]] = future.result()
+            except Exception as e: print(f"Kakao Mobility API Error: {e}")
+    return result
 
-def get_real_duration_google(origin_lat, origin_lng, dest_lat, dest_lng):
+def get_travel_times(origins, destinations, mode="driving", provider="google"):
     """
-    구글 Distance Matrix API를 사용하여 이동 시간(초)을 반환
+    출발지 목록 x 도착지 목록의 이동 시간(초) 행렬을 반환합니다.
+    캐시에 없는 쌍만 API로 조회하며, 실패한 칸은 NO_ROUTE(999999)입니다.
+    provider: "google" (Distance Matrix 배치) 또는 "kakao" (자동차 길찾기)
     """
-    if not MY_GOOGLE_KEY: return 999999
-    
+    if not origins or not destinations: return []
+    o_keys = [_round_point(*o) for o in origins]
+    d_keys = [_round_point(*d) for d in destinations]
+    pairs = list(dict.fromkeys((o, d) for o in o_keys for d in d_keys if o != d))
+
+    known = _travel_cache.get_many(provider, mode, pairs)
+    missing = [p for p in pairs if p not in known]
+    if missing and provider_enabled(provider):
+        try:
+            if provider == "kakao":
+                fetched = _kakao_matrix(missing)
+            else:
+                fetched = _google_matrix(missing, mode)
+            _travel_cache.put_many(provider, mode, fetched)
+            known.update(fetched)
+        except Exception as e:
+            print(f"Travel time API Error ({provider}): {e}")
+
+    return [[0 if o == d else known.get((o, d), NO_ROUTE) for d in d_keys] for o in o_keys]
+
+def get_real_duration_kakao(origin_lat, origin_lng, dest_lat, dest_lng):
+    """
+    카카오 모빌리티 API를 사용하여 자동차 이동 시간을 초(seconds) 단위로 반환 (캐시 사용)
+    """
+    if not MY_KAKAO_KEY: return NO_ROUTE # 키 없으면 무시
     try:
-        # googlemaps 클라이언트 생성 (이미 상단에 import googlemaps 되어 있어야 함)
-        gmaps = googlemaps.Client(key=MY_GOOGLE_KEY)
-        
-        # 거리 행렬 조회 (mode='driving' 또는 'walking', 'transit')
-        # 해외 여행지 특성에 맞춰 'driving'(차량) 또는 'walking'(도보) 권장
-        result = gmaps.distance_matrix(
-            origins=(origin_lat, origin_lng),
-            destinations=(dest_lat, dest_lng),
-            mode="driving" 
-        )
-        
-        # 응답 파싱
-        element = result['rows'][0]['elements'][0]
-        if element['status'] == 'OK':
-            # duration['value']는 초(seconds) 단위
-            return element['duration']['value']
-        else:
-            return 999999
-    except Exception as e:
-        print(f"Google Maps API Error: {e}")
-        return 999999
\ No newline at end of file
+        return get_travel_times([(origin_lat, origin_lng)], [(dest_lat, dest_lng)], "driving", "kakao")[0][0]
+    except (TypeError, ValueError):
+        return NO_ROUTE # 에러 시 아주 큰 값 반환
+
+def get_real_duration_google(origin_lat, origin_lng, dest_lat, dest_lng, mode="driving"):
+    """
+    구글 Distance Matrix API를 사용하여 이동 시간(초)을 반환 (캐시 사용)
+    해외 여행지 특성에 맞춰 'driving'(차량) 또는 'walking'(도보) 권장
+    """
+    if not MY_GOOGLE_KEY: return NO_ROUTE
+    try:
+        return get_travel_times([(origin_lat, origin_lng)], [(dest_lat, dest_lng)], mode, "google")[0][0]
+    except (TypeError, ValueError):
+        return NO_ROUTE
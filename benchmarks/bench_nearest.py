@@ -0,0 +1,81 @@
+# benchmarks/bench_nearest.py
+# 최근접 후보 선택 벤치마크: 기존 정렬 방식 vs NumPy 마스크 풀 vs 격자(버킷) 인덱스
+# 실행: python benchmarks/bench_nearest.py [--sizes 200 2000 20000] [--steps 100] [--json]
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import geo
+from travel_logic import haversine_distance
+
+def make_places(n, seed):
+    # 도시 하나 규모(중심에서 표준편차 약 10~15km)로 흩어진 가상의 장소
+    rng = random.Random(seed)
+    return [{"name": f"place_{i}", "lat": 33.45 + rng.gauss(0, 0.1), "lng": 126.55 + rng.gauss(0, 0.15)}
+            for i in range(n)]
+
+def run_sort(places, steps):
+    # generate_plans의 기존 방식: 매번 전체 정렬 후 remove
+    candidates = places[:]
+    last = candidates.pop(0)
+    started = time.perf_counter()
+    for _ in range(min(steps, len(candidates))):
+        candidates.sort(key=lambda p: haversine_distance(last['lat'], last['lng'], p.get('lat'), p.get('lng')))
+        selected = candidates[0]
+        candidates.remove(selected)
+        last = selected
+    return time.perf_counter() - started
+
+def run_pool(places, steps, pool_cls):
+    started = time.perf_counter()
+    engine = geo.DistanceEngine(places)
+    pool = pool_cls(engine, range(1, len(places)))
+    setup = time.perf_counter() - started
+    last = 0
+    started = time.perf_counter()
+    for _ in range(min(steps, len(pool))):
+        selected = pool.nearest(last)
+        pool.remove(selected)
+        last = selected
+    return setup, time.perf_counter() - started
+
+def main():
+    parser = argparse.ArgumentParser(description="최근접 후보 선택 벤치마크")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 20000])
+    parser.add_argument("--steps", type=int, default=100, help="크기별 연속 선택 횟수")
+    parser.add_argument("--json", action="store_true", help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        places = make_places(n, seed=n)
+        steps = min(args.steps, n - 1)
+        sort_time = run_sort(places, steps)
+        mask_setup, mask_time = run_pool(places, steps, geo.MaskPool)
+        grid_setup, grid_time = run_pool(places, steps, geo.GridPool)
+        results.append({
+            "places": n, "steps": steps,
+            "sort_ms_per_step": sort_time / steps * 1000,
+            "mask_setup_ms": mask_setup * 1000, "mask_ms_per_step": mask_time / steps * 1000,
+            "grid_setup_ms": grid_setup * 1000, "grid_ms_per_step": grid_time / steps * 1000,
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'places':>8} {'steps':>6} {'sort/step':>12} {'mask setup':>12} {'mask/step':>12} {'grid setup':>12} {'grid/step':>12}")
+    for r in results:
+        print(f"{r['places']:>8} {r['steps']:>6} {r['sort_ms_per_step']:>10.3f}ms "
+              f"{r['mask_setup_ms']:>10.2f}ms {r['mask_ms_per_step']:>10.3f}ms "
+              f"{r['grid_setup_ms']:>10.2f}ms {r['grid_ms_per_step']:>10.3f}ms")
+
+if __name__ == "__main__":
+    main()
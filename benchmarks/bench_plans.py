@@ -0,0 +1,195 @@
+# benchmarks/bench_plans.py
+# 일정 생성 벤치마크: 가상 도시 데이터(장소 100 ~ 100,000개)로 generate_plans의 단계별 시간을 잽니다.
+#   dedupe(중복 제거) / score(점수 + 정렬) / bucket(분류) / engine(좌표 배열) / shuffle(상위 그룹 섞기)
+#   / 테마별 동선 / 전체(캐시 없음, 캐시 있음). 앞의 네 단계는 실제 prepare_pool의 diagnostics 구간 시간입니다.
+# backend.get_place_view를 가짜 데이터로 바꿔서 실행하므로 인터넷, 구글 시트, API 키가 필요 없습니다.
+# 실행: python benchmarks/bench_plans.py [--sizes 100 1000 10000 100000] [--durations 1 3 7 14]
+#                                         [--repeat 3] [--optimize] [--out results.json|results.csv]
+import argparse
+import csv
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+sys.path.append(parent_dir)
+
+import numpy as np
+
+import backend
+import diagnostics
+import place_classifier
+import place_index
+import travel_logic as logic
+
+CITY = "벤치시티"
+STYLES = ["맛집", "힐링"]
+
+# 수집 데이터와 비슷한 카테고리 구성 (카테고리, 비율) - 구글 types / 카카오 분류 / TourAPI가 섞여 있음
+CATEGORY_MIX = [
+    ("restaurant", 0.18), ("음식점", 0.12), ("cafe", 0.10), ("카페", 0.06), ("bakery", 0.02),
+    ("tourist_attraction", 0.12), ("관광지", 0.08), ("park", 0.06), ("museum", 0.04), ("shopping_mall", 0.03),
+    ("hiking_area", 0.02), ("spa", 0.02),
+    ("lodging", 0.07), ("호텔", 0.04), ("펜션", 0.02), ("resort_hotel", 0.02),
+]
+NAME_WORDS = ["해변", "공원", "식당", "카페", "박물관", "시장", "호텔", "리조트", "숲길", "전망대",
+              "beach", "garden", "museum", "market", "tower", "bakery", "spa", "forest", "lake", "mall"]
+DUPLICATE_RATIO = 0.05    # 다른 제공자에서 이름이 조금 다르게 들어온 같은 장소 비율
+NO_COORD_RATIO = 0.01     # 좌표가 없는 장소 비율
+IMAGE_RATIO = 0.6         # 이미지가 있는 장소 비율
+
+def make_places(n, seed):
+    """
+    도시 하나 규모의 가상 장소 목록.
+    좌표는 번화가 여러 곳(가우시안)에 몰려 있고 일부는 도시 전체에 흩어져 있습니다.
+    """
+    rng = random.Random(seed)
+    categories = [c for c, _ in CATEGORY_MIX]
+    weights = [w for _, w in CATEGORY_MIX]
+    hotspots = [(33.45 + rng.gauss(0, 0.08), 126.55 + rng.gauss(0, 0.12), rng.uniform(0.005, 0.03))
+                for _ in range(max(3, n // 2000))]
+    places = []
+    for i in range(n):
+        if rng.random() < 0.8:
+            lat0, lng0, spread = rng.choice(hotspots)
+            lat, lng = lat0 + rng.gauss(0, spread), lng0 + rng.gauss(0, spread * 1.3)
+        else:
+            lat, lng = 33.45 + rng.gauss(0, 0.1), 126.55 + rng.gauss(0, 0.15)
+        if rng.random() < NO_COORD_RATIO: lat, lng = 0, 0
+        places.append({
+            "id": f"bench_{i}", "source": rng.choice(["google", "kakao", "tourapi"]),
+            "name": f"{rng.choice(NAME_WORDS)} {rng.choice(NAME_WORDS)} {i}", "city": CITY,
+            "category": rng.choices(categories, weights)[0], "lat": lat, "lng": lng, "address": "",
+            "rating": round(rng.uniform(0, 5), 1), "img_url": "img" if rng.random() < IMAGE_RATIO else "",
+            "desc": "", "updated_at": "",
+        })
+    # 같은 장소가 다른 제공자에서 들어온 경우: 괄호 설명이 붙고 좌표가 수십 m 어긋남
+    for j in rng.sample(range(n), int(n * DUPLICATE_RATIO)):
+        src = places[j]
+        places.append(dict(src, id=f"bench_dup_{j}", name=f"{src['name']} (본점)",
+                           lat=src['lat'] + rng.gauss(0, 0.0002) if src['lat'] else 0,
+                           lng=src['lng'] + rng.gauss(0, 0.0002) if src['lng'] else 0))
+    for p in places: place_classifier.classify(p)  # 저장 시점 분류와 동일하게
+    return places
+
+def use_mock_backend(places):
+    """
+    DB 대신 가짜 데이터를 돌려주도록 backend 함수 교체 (버전이 바뀌면 캐시도 새로 계산)
+    실제 SQLite 저장소처럼 열 배열 색인(place_index)의 평점순 PlaceView로 돌려줍니다.
+    """
+    columns = list(places[0])
+    ordered = sorted(places, key=lambda p: -p['rating'])
+    city_places = place_index.CityPlaces(columns, [[p[c] for c in columns] for p in ordered])
+    version = {"value": 0}
+    backend.get_place_view = lambda city, category_filter=None, limit=50: city_places.select(category_filter, limit)
+    backend.get_data_version = lambda city: f"bench:{len(places)}:{version['value']}"
+    def bump():
+        version['value'] += 1
+        logic.invalidate_pool_cache()
+    return bump
+
+def timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - started) * 1000
+
+POOL_STAGES = {"dedupe_ms": "plan.dedupe", "score_ms": "plan.score", "bucket_ms": "plan.bucket", "engine_ms": "plan.engine"}
+
+def run_stages(bump, durations, optimize):
+    """
+    generate_plans와 같은 코드로 단계별 시간(ms) 측정
+    후보군 준비는 실제 prepare_pool을 캐시 없이 한 번 실행하고 diagnostics 구간(span) 시간을 읽습니다.
+    """
+    bump()
+    diagnostics.start_run("bench")
+    try:
+        pool = logic.prepare_pool(CITY, STYLES)
+    finally:
+        summary = diagnostics.end_run(log=False)
+    stages = {name: summary['spans'].get(span, {}).get('ms', 0.0) for name, span in POOL_STAGES.items()}
+    buckets, stages['shuffle_ms'] = timed(logic.shuffle_buckets, pool, 0)
+
+    rows = []
+    for duration in durations:
+        row = {"duration": duration, **stages, "unique_places": len(pool['places'])}
+        total = 0.0
+        for i, theme in enumerate(logic.THEMES):
+            _, ms = timed(logic.build_theme_routes, theme, i, pool['engine'], buckets, duration, 0, optimize)
+            row[f"theme_{theme['mix_ratio']}_ms"] = ms
+            total += ms
+        row['themes_total_ms'] = total
+        rows.append(row)
+    return rows
+
+def run_end_to_end(bump, duration, optimize):
+    """generate_plans 전체: 캐시 없음(첫 요청) / 캐시 있음('다시 추천')"""
+    data = {"dest_city": CITY, "style": STYLES}
+    bump()
+    _, cold = timed(lambda: logic.generate_plans(data, duration, optimize_routes=optimize, seed=1))
+    _, warm = timed(lambda: logic.generate_plans(data, duration, optimize_routes=optimize, seed=2))
+    return cold, warm
+
+def summarize(samples):
+    """반복 측정 결과 -> 숫자 항목은 중앙값"""
+    out = dict(samples[0])
+    for key, value in samples[0].items():
+        if key.endswith("_ms"): out[key] = round(statistics.median(s[key] for s in samples), 3)
+    return out
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=parent_dir,
+                                capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        commit = ""
+    return {"commit": commit, "python": platform.python_version(), "numpy": np.__version__,
+            "cpus": os.cpu_count(), "theme_workers": logic.THEME_WORKERS}
+
+def main():
+    parser = argparse.ArgumentParser(description="일정 생성 벤치마크 (오프라인)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 100000])
+    parser.add_argument("--durations", type=int, nargs="+", default=[1, 3, 7, 14], help="여행 일수 (1~14)")
+    parser.add_argument("--repeat", type=int, default=3, help="반복 횟수 (중앙값 사용)")
+    parser.add_argument("--optimize", action="store_true", help="동선 개선(2-opt / or-opt) 포함")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--out", help="결과 파일 (.json 또는 .csv). 없으면 표로 출력")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.sizes:
+        places = make_places(n, args.seed + n)
+        bump = use_mock_backend(places)
+        per_duration = {d: [] for d in args.durations}
+        for _ in range(args.repeat):
+            for row in run_stages(bump, args.durations, args.optimize):
+                row['generate_cold_ms'], row['generate_warm_ms'] = run_end_to_end(bump, row['duration'], args.optimize)
+                per_duration[row['duration']].append(row)
+        for d in args.durations:
+            results.append({"places": n, "input_rows": len(places), "optimize": args.optimize, **summarize(per_duration[d])})
+        print(f"✅ {n}개 완료", file=sys.stderr)
+
+    if args.out and args.out.endswith(".csv"):
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(results)
+        return
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"environment": environment(), "results": results}, f, indent=2, ensure_ascii=False)
+        return
+
+    print(f"{'places':>8} {'days':>5} {'dedupe':>10} {'score':>10} {'bucket':>10} {'engine':>10} {'themes':>10} {'cold':>10} {'warm':>10}")
+    for r in results:
+        print(f"{r['places']:>8} {r['duration']:>5} {r['dedupe_ms']:>8.1f}ms {r['score_ms']:>8.1f}ms "
+              f"{r['bucket_ms']:>8.1f}ms {r['engine_ms']:>8.1f}ms {r['themes_total_ms']:>8.1f}ms "
+              f"{r['generate_cold_ms']:>8.1f}ms {r['generate_warm_ms']:>8.1f}ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# benchmarks/import_budget.py
+# import 시간 예산 확인: `python -X importtime -c "import <모듈>"` 출력을 읽어서
+#   1) 페이지 시작 때 불러오면 안 되는 무거운 라이브러리(pandas, gspread, googlemaps ...)가 끌려오지 않았는지
+#   2) 모듈 import 시간(streamlit 자체 시간은 빼고)이 예산 안인지 확인합니다.
+# 예산을 넘거나 금지 라이브러리가 import 되면 종료 코드 1 (CI에서 회귀 방지용)
+# 실행: python benchmarks/import_budget.py [--repeat 3] [--verbose]
+import argparse
+import os
+import subprocess
+import sys
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+parent_dir = os.path.dirname(current_dir)
+
+# 모듈 -> import 시간 예산(ms, streamlit 제외). 현재 측정값의 2~3배 정도 여유를 둠
+BUDGETS_MS = {
+    "backend": 150,       # numpy(장소 색인) 포함
+    "travel_logic": 350,
+    "jobs": 350,
+}
+# 필요한 코드 경로에서만 import 해야 하는 라이브러리 (최상위 패키지 이름)
+FORBIDDEN = ["pandas", "gspread", "googlemaps", "oauth2client", "requests", "PIL"]
+# 페이지가 어차피 먼저 불러오는 라이브러리 -> 예산 계산에서 뺌
+BASELINE = ["streamlit"]
+
+def measure(module):
+    """
+    -X importtime 한 번 실행 -> (전체 µs, 기준 라이브러리 µs, {최상위 패키지: 누적 µs})
+    출력 형식: "import time: self [us] | cumulative | imported package" (들여쓰기 = 중첩 깊이)
+    """
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                          cwd=parent_dir, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"{module} import 실패:\n{proc.stderr[-2000:]}")
+    total, baseline, packages = 0, 0, {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line: continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        if not cumulative.strip().isdigit(): continue  # 머리글 줄
+        us, depth, name = int(cumulative), len(name) - len(name.lstrip()), name.strip()
+        top = name.split(".")[0]
+        packages[top] = max(packages.get(top, 0), us)
+        if name == module and depth == 1: total = us
+        if name in BASELINE: baseline += us
+    return total, baseline, packages
+
+def check(module, budget_ms, repeat, verbose):
+    """반복 측정 중 가장 빠른 값 기준 (디스크 캐시 / 다른 프로세스 영향 줄이기)"""
+    runs = [measure(module) for _ in range(repeat)]
+    total, baseline, packages = min(runs, key=lambda r: r[0] - r[1])
+    own_ms = (total - baseline) / 1000
+    errors = [f"{module}: 금지 라이브러리 import ({name})" for name in FORBIDDEN if name in packages]
+    if own_ms > budget_ms:
+        errors.append(f"{module}: import {own_ms:.1f}ms > 예산 {budget_ms}ms")
+    status = "❌" if errors else "✅"
+    print(f"{status} {module:<14} {own_ms:>8.1f}ms / {budget_ms}ms (streamlit 포함 {total / 1000:.1f}ms)")
+    if verbose:
+        for name, us in sorted(packages.items(), key=lambda kv: -kv[1])[:10]:
+            print(f"     {name:<24} {us / 1000:>8.1f}ms")
+    return errors
+
+def main():
+    parser = argparse.ArgumentParser(description="import 시간 예산 확인")
+    parser.add_argument("--repeat", type=int, default=3, help="모듈별 측정 횟수 (가장 빠른 값 사용)")
+    parser.add_argument("--verbose", action="store_true", help="오래 걸린 패키지 상위 10개 출력")
+    args = parser.parse_args()
+
+    errors = []
+    for module, budget in BUDGETS_MS.items():
+        errors += check(module, budget, args.repeat, args.verbose)
+    for e in errors: print(f"  - {e}", file=sys.stderr)
+    sys.exit(1 if errors else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+# cities.py
+# 도시 이름 정규화 표: 사용자가 입력한 도시 이름 / DB의 city 값 -> 표준 도시 ID
+# - "제주", "제주도", "제주특별자치도", "Jeju"는 모두 "jeju"
+# - "광주"(광주광역시)와 "경기 광주"는 서로 다른 도시 (부분 문자열로 찾지 않음)
+# - 표에 없는 도시는 공백/문장부호를 뺀 소문자 이름을 ID로 씁니다. ("바르셀로나, 스페인" -> "바르셀로나")
+# DB에는 이 ID를 city_id 열에 저장해서 도시 조회를 인덱스 한 번으로 끝냅니다.
+import unicodedata
+from functools import lru_cache
+
+# 표준 ID -> (대표 이름, 국내 여부, 별칭). 별칭은 공백을 빼고 비교하므로 "경기 광주" = "경기광주"
+CITY_TABLE = {
+    # --- 국내 ---
+    "seoul": ("서울", True, ["서울", "서울시", "서울특별시"]),
+    "busan": ("부산", True, ["부산", "부산시", "부산광역시"]),
+    "jeju": ("제주", True, ["제주", "제주도", "제주시", "제주특별자치도", "제주섬"]),
+    "seogwipo": ("서귀포", True, ["서귀포", "서귀포시", "제주서귀포"]),
+    "incheon": ("인천", True, ["인천", "인천시", "인천광역시"]),
+    "daegu": ("대구", True, ["대구", "대구시", "대구광역시"]),
+    "daejeon": ("대전", True, ["대전", "대전시", "대전광역시"]),
+    "gwangju": ("광주", True, ["광주", "광주광역시"]),
+    "gyeonggi-gwangju": ("경기 광주", True, ["경기광주", "경기광주시", "경기도광주", "경기도광주시"]),
+    "ulsan": ("울산", True, ["울산", "울산시", "울산광역시"]),
+    "sejong": ("세종", True, ["세종", "세종시", "세종특별자치시"]),
+    "suwon": ("수원", True, ["수원", "수원시"]),
+    "gangneung": ("강릉", True, ["강릉", "강릉시"]),
+    "gyeongju": ("경주", True, ["경주", "경주시"]),
+    "jeonju": ("전주", True, ["전주", "전주시"]),
+    "yeosu": ("여수", True, ["여수", "여수시"]),
+    "sokcho": ("속초", True, ["속초", "속초시"]),
+    "chuncheon": ("춘천", True, ["춘천", "춘천시"]),
+    "gapyeong": ("가평", True, ["가평", "가평군"]),
+    "yangpyeong": ("양평", True, ["양평", "양평군"]),
+    "pohang": ("포항", True, ["포항", "포항시"]),
+    "geoje": ("거제", True, ["거제", "거제시", "거제도"]),
+    "namhae": ("남해", True, ["남해", "남해군"]),
+    "tongyeong": ("통영", True, ["통영", "통영시"]),
+    "gunsan": ("군산", True, ["군산", "군산시"]),
+    "mokpo": ("목포", True, ["목포", "목포시"]),
+    "suncheon": ("순천", True, ["순천", "순천시"]),
+    "andong": ("안동", True, ["안동", "안동시"]),
+    "cheongju": ("청주", True, ["청주", "청주시"]),
+    "chungju": ("충주", True, ["충주", "충주시"]),
+    "cheonan": ("천안", True, ["천안", "천안시"]),
+    # --- 해외 ---
+    "tokyo": ("도쿄", False, ["도쿄", "동경", "東京", "일본도쿄", "도쿄일본"]),
+    "osaka": ("오사카", False, ["오사카", "大阪", "일본오사카", "오사카일본"]),
+    "kyoto": ("교토", False, ["교토", "京都"]),
+    "fukuoka": ("후쿠오카", False, ["후쿠오카", "福岡"]),
+    "sapporo": ("삿포로", False, ["삿포로", "札幌"]),
+    "okinawa": ("오키나와", False, ["오키나와", "沖縄"]),
+    "taipei": ("타이베이", False, ["타이베이", "타이페이", "台北"]),
+    "hongkong": ("홍콩", False, ["홍콩", "香港"]),
+    "bangkok": ("방콕", False, ["방콕"]),
+    "danang": ("다낭", False, ["다낭"]),
+    "hanoi": ("하노이", False, ["하노이"]),
+    "hochiminh": ("호치민", False, ["호치민", "호찌민", "hochiminhcity"]),
+    "singapore": ("싱가포르", False, ["싱가포르", "싱가폴"]),
+    "cebu": ("세부", False, ["세부"]),
+    "bali": ("발리", False, ["발리"]),
+    "guam": ("괌", False, ["괌"]),
+    "paris": ("파리", False, ["파리"]),
+    "london": ("런던", False, ["런던"]),
+    "rome": ("로마", False, ["로마"]),
+    "barcelona": ("바르셀로나", False, ["바르셀로나"]),
+    "newyork": ("뉴욕", False, ["뉴욕", "nyc"]),
+}
+# 표에 없는 이름에서 떼어내는 행정구역 접미사 (긴 것부터)
+ADMIN_SUFFIXES = ["특별자치도", "특별자치시", "특별시", "광역시"]
+
+def _compact(name):
+    """전각/반각 통일 + 소문자 + 글자/숫자만 남김"""
+    name = unicodedata.normalize("NFKC", str(name or "")).lower()
+    return "".join(ch for ch in name if ch.isalnum())
+
+_ALIASES = {}
+for _cid, (_label, _, _names) in CITY_TABLE.items():
+    for _name in [_cid, _label] + _names:
+        _ALIASES[_compact(_name)] = _cid
+
+def _strip_suffix(key):
+    for suffix in ADMIN_SUFFIXES:
+        if key.endswith(suffix) and len(key) > len(suffix): return key[:-len(suffix)]
+    return key
+
+@lru_cache(maxsize=4096)
+def city_id(name):
+    """도시 이름 -> 표준 도시 ID (같은 도시면 항상 같은 값, 이미 ID인 값을 넣어도 그대로)"""
+    key = _compact(name)
+    if key in _ALIASES: return _ALIASES[key]
+    # "바르셀로나, 스페인"처럼 쉼표 뒤에 국가가 붙은 경우 앞부분만
+    first = _compact(str(name or "").split(",")[0])
+    for candidate in (first, _strip_suffix(first)):
+        if candidate in _ALIASES: return _ALIASES[candidate]
+    return _strip_suffix(first) or key
+
+def display_name(cid):
+    """표준 ID -> 대표 이름 (표에 없으면 ID 그대로)"""
+    entry = CITY_TABLE.get(cid)
+    return entry[0] if entry else cid
+
+def is_domestic(name):
+    """표에 있는 도시면 국내 여부, 없으면 None (판단 불가)"""
+    entry = CITY_TABLE.get(city_id(name))
+    return entry[1] if entry else None
@@ -0,0 +1,90 @@
+# diagnostics.py
+# 가벼운 단계별 계측: 이름 붙은 구간(span)의 실행 시간 / 처리한 행 수 / 외부 호출 횟수를 모읍니다.
+# - 실행(run)을 시작하지 않으면 span()/count()는 아무 일도 하지 않습니다. (평소 비용 거의 0)
+# - 환경 변수 PICKNGO_DIAG=1 또는 결과 페이지 주소의 ?diag=1 로 켭니다.
+# - 실행이 끝나면 요약을 logs/diagnostics.jsonl에 한 줄씩 추가합니다. (나중에 모아서 분석)
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+ENABLED = os.environ.get("PICKNGO_DIAG", "0") == "1"
+LOG_PATH = os.environ.get("PICKNGO_DIAG_LOG", os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "diagnostics.jsonl"))
+
+# 요청 스레드 -> 현재 실행. 수집 스레드 풀에는 contextvars.copy_context()로 넘겨서 같은 실행에 기록됩니다.
+_current = contextvars.ContextVar("diagnostics_run", default=None)
+_log_lock = threading.Lock()
+
+class _Run:
+    def __init__(self, label, meta):
+        self.label = label
+        self.meta = meta
+        self.started = time.perf_counter()
+        self.spans = {}      # 이름 -> {"ms", "calls", "rows"} (같은 이름은 누적)
+        self.counters = {}   # 이름 -> 횟수 (외부 API / 시트 / DB 호출 등)
+        self.lock = threading.Lock()
+
+    def add_span(self, name, ms, rows):
+        with self.lock:
+            s = self.spans.setdefault(name, {"ms": 0.0, "calls": 0, "rows": 0})
+            s['ms'] += ms
+            s['calls'] += 1
+            s['rows'] += rows
+
+    def add_count(self, name, n):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+def start_run(label, **meta):
+    """계측 실행 시작 (이전 실행이 끝나지 않았으면 버림)"""
+    _current.set(_Run(label, meta))
+
+def active():
+    return _current.get() is not None
+
+@contextmanager
+def span(name, rows=0):
+    """
+    with span("plan.dedupe") as s: ... ; s['rows'] = len(result)
+    실행 중이 아니면 시간도 재지 않습니다.
+    """
+    run = _current.get()
+    info = {"rows": rows}
+    if run is None:
+        yield info
+        return
+    started = time.perf_counter()
+    try:
+        yield info
+    finally:
+        run.add_span(name, (time.perf_counter() - started) * 1000, int(info.get('rows') or 0))
+
+def count(name, n=1):
+    """외부 호출 횟수 등 카운터 증가"""
+    run = _current.get()
+    if run is not None: run.add_count(name, n)
+
+def end_run(log=True):
+    """실행 종료 -> 요약 dict (실행 중이 아니면 None). log=True면 JSONL 파일에 추가"""
+    run = _current.get()
+    if run is None: return None
+    _current.set(None)
+    summary = {
+        "time": datetime.now().isoformat(timespec="seconds"), "label": run.label, **run.meta,
+        "total_ms": round((time.perf_counter() - run.started) * 1000, 1),
+        "spans": {k: dict(v, ms=round(v['ms'], 1)) for k, v in sorted(run.spans.items(), key=lambda kv: -kv[1]['ms'])},
+        "counters": dict(sorted(run.counters.items())),
+    }
+    if log: _append_log(summary)
+    return summary
+
+def _append_log(summary):
+    try:
+        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
+        with _log_lock, open(LOG_PATH, "a", encoding="utf-8") as f:
+            f.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    except OSError as e:
+        print(f"⚠️ 진단 로그 저장 실패: {e}")
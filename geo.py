@@ -0,0 +1,221 @@
+# geo.py
+# 거리 계산 엔진: 후보 장소 좌표를 한 번만 NumPy 배열(라디안)로 바꿔두고
+# "가장 가까운 후보 찾기"를 전체 정렬 대신 벡터 연산 + argmin으로 처리합니다.
+import math
+import numpy as np
+
+EARTH_RADIUS_KM = 6371
+NO_DISTANCE = 99999      # 좌표가 없을 때 거리 (travel_logic.haversine_distance와 동일)
+# 장소 수가 이 이하이면 전체 거리 행렬을 미리 계산 (400개 = 0.64MB, 약 6ms)
+# 600개부터는 행렬 계산 시간이 동선 계산에서 아끼는 시간과 비슷해지고, 후보군 캐시마다 하나씩 들고 있으므로 작게 유지
+PAIRWISE_MAX = 400
+
+def _parse_coord(value):
+    # 기존 haversine_distance처럼 빈 값/0/숫자가 아닌 값은 좌표 없음으로 처리
+    if not value: return None
+    try: return float(value)
+    except (TypeError, ValueError): return None
+
+def to_radians(places):
+    """장소 리스트 -> (위도 라디안 배열, 경도 라디안 배열, 좌표 유효 여부 배열)"""
+    n = len(places)
+    lat = np.zeros(n)
+    lng = np.zeros(n)
+    valid = np.zeros(n, dtype=bool)
+    for i, p in enumerate(places):
+        la, ln = _parse_coord(p.get('lat')), _parse_coord(p.get('lng'))
+        if la is None or ln is None: continue
+        lat[i], lng[i], valid[i] = la, ln, True
+    return np.radians(lat), np.radians(lng), valid
+
+def haversine_many(lat, lng, lats, lngs):
+    """한 지점(라디안)에서 여러 지점(라디안 배열)까지의 거리(km)"""
+    a = np.sin((lats - lat) / 2) ** 2 + np.cos(lat) * np.cos(lats) * np.sin((lngs - lng) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+class DistanceEngine:
+    """
+    장소 목록 전체에 대한 거리 계산기.
+    장소는 리스트 인덱스로 가리키며, 후보 집합은 bool 마스크로 넘깁니다.
+    """
+
+    def __init__(self, places, pairwise_max=PAIRWISE_MAX):
+        self.lat, self.lng, self.valid = to_radians(places)
+        self.size = len(places)
+        self.pairwise_max = pairwise_max
+        self.matrix = self._pairwise() if 0 < self.size <= pairwise_max else None
+
+    def __getstate__(self):
+        # 저장(plan_store pickle)할 때는 거리 행렬을 빼고 좌표만 -> 읽을 때 다시 계산
+        state = self.__dict__.copy()
+        state['matrix'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.pairwise_max = state.get('pairwise_max', PAIRWISE_MAX)  # 예전에 저장한 엔진은 행렬이 들어 있어도 다시 정함
+        self.matrix = self._pairwise() if 0 < self.size <= self.pairwise_max else None
+
+    def _pairwise(self):
+        lat, lng = self.lat[:, None], self.lng[:, None]
+        a = np.sin((self.lat - lat) / 2) ** 2 + np.cos(lat) * np.cos(self.lat) * np.sin((self.lng - lng) / 2) ** 2
+        m = (2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))).astype(np.float32)
+        m[~self.valid, :] = NO_DISTANCE
+        m[:, ~self.valid] = NO_DISTANCE
+        return m
+
+    def mask(self, indices):
+        """인덱스 목록 -> 후보 bool 마스크"""
+        m = np.zeros(self.size, dtype=bool)
+        m[list(indices)] = True
+        return m
+
+    def distances_from(self, i):
+        """장소 i에서 모든 장소까지의 거리(km) 벡터"""
+        if self.matrix is not None: return self.matrix[i]
+        if not self.valid[i]: return np.full(self.size, NO_DISTANCE, dtype=float)
+        d = haversine_many(self.lat[i], self.lng[i], self.lat, self.lng)
+        d[~self.valid] = NO_DISTANCE
+        return d
+
+    def distance(self, i, j):
+        if self.matrix is not None: return float(self.matrix[i, j])
+        if not (self.valid[i] and self.valid[j]): return NO_DISTANCE
+        lat1, lng1, lat2, lng2 = float(self.lat[i]), float(self.lng[i]), float(self.lat[j]), float(self.lng[j])
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+    def nearest(self, i, mask):
+        """mask가 True인 후보 중 장소 i에서 가장 가까운 인덱스 (후보가 없으면 None)"""
+        if not mask.any(): return None
+        d = np.where(mask, self.distances_from(i), np.inf)
+        return int(np.argmin(d))
+
+# ==========================================
+# 후보 풀: 최근접 후보 찾기 + 삭제를 지원하는 자료구조
+# ==========================================
+KM_PER_DEG = 111.195     # 위도 1도당 거리(km)
+GRID_MIN_SIZE = 3000     # 후보가 이보다 많으면 격자(버킷) 인덱스 사용
+GRID_TARGET_PER_CELL = 4 # 격자 한 칸에 들어갈 평균 후보 수
+
+class MaskPool:
+    """NumPy 마스크 기반 후보 풀 (argmin 한 번에 최근접 탐색, 작은 풀에 유리)"""
+
+    def __init__(self, engine, indices):
+        self.engine = engine
+        self.order = list(indices)
+        self.alive = engine.mask(self.order)
+        self._count = len(set(self.order))
+        self._cursor = 0
+
+    def __len__(self):
+        return self._count
+
+    def first(self):
+        # 풀 순서상 첫 번째 남은 후보
+        while self._cursor < len(self.order) and not self.alive[self.order[self._cursor]]:
+            self._cursor += 1
+        return self.order[self._cursor] if self._cursor < len(self.order) else None
+
+    def nearest(self, i):
+        return self.engine.nearest(i, self.alive)
+
+    def remove(self, i):
+        if self.alive[i]:
+            self.alive[i] = False
+            self._count -= 1
+
+class GridPool(MaskPool):
+    """
+    위경도 격자 버킷 인덱스 (삭제 지원).
+    기준점이 속한 칸에서 시작해 고리(ring) 모양으로 넓혀가며 찾고,
+    남은 고리에 더 가까운 후보가 있을 수 없으면 바로 멈춥니다. (후보 수와 무관하게 칸 몇 개만 확인)
+    """
+
+    def __init__(self, engine, indices):
+        super().__init__(engine, indices)
+        lat_deg = np.degrees(engine.lat)
+        lng_deg = np.degrees(engine.lng)
+        self._lat = engine.lat.tolist()
+        self._lng = engine.lng.tolist()
+
+        members = sorted(set(self.order))
+        located = [i for i in members if engine.valid[i]]
+        self._unlocated = [i for i in members if not engine.valid[i]]  # 좌표 없는 후보 (맨 마지막 순위)
+        self.buckets = {}
+        self._cells = {}
+        self.cell = 0.01
+        if not located: return
+
+        la, ln = lat_deg[located], lng_deg[located]
+        self.lat0, self.lng0 = float(la.min()), float(ln.min())
+        area = max((float(la.max()) - self.lat0) * (float(ln.max()) - self.lng0), 1e-6)
+        self.cell = max(float(np.sqrt(area * GRID_TARGET_PER_CELL / len(located))), 0.0005)
+        self.max_x = int((float(ln.max()) - self.lng0) / self.cell)
+        self.max_y = int((float(la.max()) - self.lat0) / self.cell)
+        # 경도 1도의 거리는 위도가 높을수록 짧아지므로, 가장 짧은 값을 기준으로 하한을 잡습니다.
+        max_abs_lat = float(np.radians(max(abs(la.min()), abs(la.max()))))
+        self._cell_km = self.cell * KM_PER_DEG * max(np.cos(max_abs_lat), 0.01)
+
+        xs = ((ln - self.lng0) // self.cell).astype(int).tolist()
+        ys = ((la - self.lat0) // self.cell).astype(int).tolist()
+        for i, x, y in zip(located, xs, ys):
+            self._cells[i] = (x, y)
+            self.buckets.setdefault((x, y), set()).add(i)
+
+    def _cell_of(self, lat, lng):
+        return (int((lng - self.lng0) // self.cell), int((lat - self.lat0) // self.cell))
+
+    def _ring(self, cx, cy, r):
+        if r == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - r, cx + r + 1):
+            yield (x, cy - r)
+            yield (x, cy + r)
+        for y in range(cy - r + 1, cy + r):
+            yield (cx - r, y)
+            yield (cx + r, y)
+
+    def _haversine(self, i, j):
+        lat1, lng1, lat2, lng2 = self._lat[i], self._lng[i], self._lat[j], self._lng[j]
+        a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+    def nearest(self, i):
+        if not self._count: return None
+        if not self.engine.valid[i] or not self.buckets:
+            # 기준점 좌표가 없으면 모든 거리가 같으므로(99999) 인덱스가 가장 작은 후보
+            return min(j for j in self.order if self.alive[j])
+
+        cx, cy = self._cell_of(math.degrees(self._lat[i]), math.degrees(self._lng[i]))
+        # 기준점이 격자 밖에 있을 수도 있으니, 격자 전체를 덮을 때까지의 최대 고리 수
+        max_r = max(abs(cx), abs(cx - self.max_x), abs(cy), abs(cy - self.max_y))
+        best, best_d = None, float("inf")
+        for r in range(max_r + 1):
+            # 아직 안 본 고리(r 이상)의 후보는 최소 ((r-1) * 칸 크기)만큼 떨어져 있음
+            if best is not None and best_d <= (r - 1) * self._cell_km: break
+            for cell in self._ring(cx, cy, r):
+                for j in self.buckets.get(cell, ()):
+                    d = self._haversine(i, j)
+                    if d < best_d or (d == best_d and j < best):
+                        best, best_d = j, d
+        if best is not None: return best
+        return self._unlocated[0] if self._unlocated else None
+
+    def remove(self, i):
+        if not self.alive[i]: return
+        super().remove(i)
+        cell = self._cells.get(i)
+        if cell is None:
+            self._unlocated.remove(i)
+            return
+        bucket = self.buckets[cell]
+        bucket.discard(i)
+        if not bucket: del self.buckets[cell]
+
+def make_pool(engine, indices, grid_min_size=GRID_MIN_SIZE):
+    """후보 수에 맞는 풀 구현을 골라서 반환"""
+    indices = list(indices)
+    if len(indices) >= grid_min_size: return GridPool(engine, indices)
+    return MaskPool(engine, indices)
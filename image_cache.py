@@ -0,0 +1,258 @@
+# image_cache.py
+# 장소 이미지 로컬 캐시: 외부 이미지(구글 사진 등)를 한 번만 내려받아 디스크에 저장합니다.
+# - 파일은 내용 해시(sha256)로 저장 (같은 이미지는 한 번만 저장)
+# - 키(예: "gphoto:places/<id>/photos/<ref>@thumb") -> 해시 매핑은 SQLite 인덱스에 기록
+# - 전체 용량이 IMAGE_CACHE_MAX_BYTES를 넘으면 오래 안 쓴 이미지부터 삭제 (LRU)
+# DB에는 API 키가 들어간 주소 대신 "imgcache:<키>" 또는 등록된 참조("gphoto:<사진 이름>" 등)만 저장합니다.
+# 참조는 화면에 처음 보일 때 register_resolver로 등록한 함수가 실제 이미지 주소로 바꿔서 한 번만 받습니다.
+# 화면에는 실제로 쓰는 크기(카드 썸네일 80x80)로 줄인 이미지를 data URI로 바로 넣습니다.
+import base64
+import hashlib
+import io
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+# requests / Pillow는 처음 내려받거나 줄일 때 import 합니다. (페이지 시작 시간 단축)
+
+IMAGE_CACHE_DIR = os.environ.get("IMAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache"))
+IMAGE_CACHE_MAX_BYTES = int(float(os.environ.get("IMAGE_CACHE_MAX_MB", 200)) * 1024 * 1024)
+LOCAL_PREFIX = "imgcache:"
+# 화면에 표시하는 크기: (가로, 세로). 세로가 None이면 비율 유지
+IMAGE_SIZES = {"thumb": (80, 80)}
+JPEG_QUALITY = 80
+DOWNLOAD_TIMEOUT = 10
+DOWNLOAD_MAX_BYTES = 5 * 1024 * 1024
+IMAGE_WORKERS = 8         # 동시에 내려받을 이미지 수
+FAILURE_RETRY = 3600      # 실패한 주소는 이 시간(초) 동안 다시 시도하지 않음 (재시작해도 유지)
+EVICT_RESYNC_PUTS = 200   # 저장 이 횟수마다 용량을 인덱스에서 다시 계산 (다른 프로세스가 저장한 것 반영)
+# 이미지가 아닌 주소를 돌려주는 곳 (카카오 장소 상세 페이지, 서비스가 끝난 Unsplash Source)
+NON_IMAGE_HOSTS = ("place.map.kakao.com", "source.unsplash.com")
+
+_local = threading.local()
+_lock = threading.Lock()
+_session = None
+_resolvers = {}   # 참조 접두어 -> 함수(참조) -> 실제 이미지 주소
+_pil = None       # (Image, ImageOps) / Pillow가 없으면 False
+_usage = {}       # 캐시 폴더 -> [전체 용량(파일 기준), 저장 횟수]. 저장할 때마다 SUM 하지 않도록 누적
+
+def _get_session():
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                import requests
+                _session = requests.Session()
+    return _session
+
+def _get_pil():
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image, ImageOps  # 선택: 없으면 원본 그대로 사용
+            _pil = (Image, ImageOps)
+        except ImportError:
+            _pil = False
+    return _pil
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        conn = sqlite3.connect(os.path.join(IMAGE_CACHE_DIR, "index.db"), timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS images (
+                key TEXT PRIMARY KEY, digest TEXT, content_type TEXT, size INTEGER, last_used REAL
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_images_last_used ON images(last_used)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_images_digest ON images(digest)")
+        # 실패한 주소 (주소 대신 _source_key 해시로 저장: 주소에 API 키가 들어 있을 수 있음)
+        conn.execute("CREATE TABLE IF NOT EXISTS failures (key TEXT PRIMARY KEY, failed_at REAL)")
+        conn.commit()
+        _local.conn = conn
+    return conn
+
+def _blob_path(digest):
+    return os.path.join(IMAGE_CACHE_DIR, digest[:2], digest)
+
+def is_local(url):
+    return isinstance(url, str) and url.startswith(LOCAL_PREFIX)
+
+def register_resolver(prefix, resolve):
+    """참조 접두어 등록: resolve(참조)는 내려받을 이미지 주소를 반환 (실패 시 예외)"""
+    _resolvers[prefix] = resolve
+
+def _resolver(url):
+    if not isinstance(url, str): return None
+    return next((fn for prefix, fn in _resolvers.items() if url.startswith(prefix)), None)
+
+def is_reference(url):
+    """외부 주소가 아닌 참조인지 (로컬 캐시 참조 또는 등록된 접두어)"""
+    return is_local(url) or _resolver(url) is not None
+
+def is_image_url(url):
+    """내려받아 볼 만한 이미지 주소인지 (참조 또는 이미지가 아닌 곳으로 알려지지 않은 http(s) 주소)"""
+    if is_reference(url): return True
+    if not isinstance(url, str) or not url: return False
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and parts.hostname not in NON_IMAGE_HOSTS
+
+def ref(key):
+    """캐시 키 -> DB에 저장할 참조 문자열"""
+    return LOCAL_PREFIX + key
+
+def has(key):
+    row = _conn().execute("SELECT digest FROM images WHERE key = ?", (key,)).fetchone()
+    return bool(row) and os.path.exists(_blob_path(row[0]))
+
+def put(key, data, content_type="image/jpeg"):
+    """이미지 바이트 저장 후 참조 문자열 반환"""
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(digest)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    conn = _conn()
+    with _lock, conn:
+        is_new = not conn.execute("SELECT 1 FROM images WHERE digest = ? LIMIT 1", (digest,)).fetchone()
+        conn.execute("INSERT OR REPLACE INTO images (key, digest, content_type, size, last_used) VALUES (?, ?, ?, ?, ?)",
+                     (key, digest, content_type, len(data), time.time()))
+    _evict(len(data) if is_new else 0)
+    return ref(key)
+
+def get(key):
+    """(바이트, content_type) 또는 None. 읽을 때마다 최근 사용 시각 갱신"""
+    if is_local(key): key = key[len(LOCAL_PREFIX):]
+    conn = _conn()
+    row = conn.execute("SELECT digest, content_type FROM images WHERE key = ?", (key,)).fetchone()
+    if not row: return None
+    try:
+        with open(_blob_path(row[0]), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    with _lock, conn:
+        conn.execute("UPDATE images SET last_used = ? WHERE key = ?", (time.time(), key))
+    return data, row[1]
+
+def data_uri(url):
+    """로컬 참조 -> <img src>에 바로 넣을 수 있는 data URI (없으면 None)"""
+    found = get(url)
+    if not found: return None
+    data, content_type = found
+    return f"data:{content_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+def _evict(added):
+    # 같은 파일을 여러 키가 가리킬 수 있으므로 용량은 파일(해시) 기준으로 계산
+    # 평소에는 누적값에 새 파일 크기만 더하고, 처음 / EVICT_RESYNC_PUTS번마다 / 정리 후에만 인덱스를 다시 셉니다.
+    conn = _conn()
+    with _lock:
+        usage = _usage.setdefault(IMAGE_CACHE_DIR, [None, 0])
+        usage[1] += 1
+        if usage[0] is None or usage[1] % EVICT_RESYNC_PUTS == 0: usage[0] = _stored_bytes(conn)
+        else: usage[0] += added
+        total = usage[0]
+        if total <= IMAGE_CACHE_MAX_BYTES: return
+        rows = conn.execute("SELECT key, digest, size FROM images ORDER BY last_used").fetchall()
+        removed = []
+        for key, digest, size in rows:
+            if total <= IMAGE_CACHE_MAX_BYTES: break
+            removed.append(key)
+            conn.execute("DELETE FROM images WHERE key = ?", (key,))
+            if not conn.execute("SELECT 1 FROM images WHERE digest = ? LIMIT 1", (digest,)).fetchone():
+                total -= size
+                try: os.remove(_blob_path(digest))
+                except OSError: pass
+        conn.commit()
+        usage[0] = _stored_bytes(conn)
+    if removed: print(f"🧹 이미지 캐시 정리: {len(removed)}개 삭제")
+
+def _stored_bytes(conn):
+    return conn.execute("SELECT COALESCE(SUM(size), 0) FROM (SELECT size FROM images GROUP BY digest)").fetchone()[0]
+
+# ==========================================
+# 🖼️ 화면용 이미지: 한 번만 받아서 줄인 뒤 data URI로
+# ==========================================
+def _source_key(url):
+    # 로컬 참조는 그 키, 등록된 참조는 참조 문자열 그대로, 외부 주소는 주소 해시를 키로 사용
+    if is_local(url): return url[len(LOCAL_PREFIX):]
+    if _resolver(url): return url
+    return "url:" + hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+def _download(url):
+    # stream=True라 본문을 다 읽지 않고 예외로 빠져나가도 연결을 돌려주도록 with로 닫습니다.
+    with _get_session().get(url, timeout=DOWNLOAD_TIMEOUT, stream=True) as res:
+        res.raise_for_status()
+        content_type = res.headers.get("Content-Type", "").split(";")[0].strip()
+        if not content_type.startswith("image/"):
+            raise ValueError(f"이미지가 아님 ({content_type or '알 수 없음'})")
+        data = res.raw.read(DOWNLOAD_MAX_BYTES + 1, decode_content=True)
+    if len(data) > DOWNLOAD_MAX_BYTES: raise ValueError("이미지가 너무 큼")
+    return data, content_type
+
+def _recently_failed(key):
+    row = _conn().execute("SELECT failed_at FROM failures WHERE key = ?", (key,)).fetchone()
+    return bool(row) and time.time() - row[0] < FAILURE_RETRY
+
+def _mark_failed(key):
+    conn = _conn()
+    with _lock, conn:
+        conn.execute("INSERT OR REPLACE INTO failures (key, failed_at) VALUES (?, ?)", (key, time.time()))
+
+def _resize(data, content_type, size):
+    """표시 크기에 맞게 줄이기 (Pillow가 없거나 읽을 수 없는 이미지면 원본 그대로)"""
+    pil = _get_pil()
+    if not pil: return data, content_type
+    Image, ImageOps = pil
+    width, height = IMAGE_SIZES[size]
+    try:
+        with Image.open(io.BytesIO(data)) as img:
+            img = ImageOps.exif_transpose(img).convert("RGB")
+            if height: img = ImageOps.fit(img, (width, height), Image.LANCZOS)
+            else: img.thumbnail((width, width * 4), Image.LANCZOS)
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=JPEG_QUALITY, optimize=True)
+            return out.getvalue(), "image/jpeg"
+    except Exception:
+        return data, content_type
+
+def display_uri(url, size="thumb"):
+    """
+    이미지 주소(외부 주소 또는 로컬 참조) -> 표시 크기로 줄인 data URI.
+    줄인 이미지도 캐시에 저장하므로 같은 이미지는 한 번만 내려받고 한 번만 줄입니다.
+    이미지 주소가 아니거나 실패하면 None (실패한 주소는 FAILURE_RETRY 동안 다시 불러오지 않음)
+    """
+    if not is_image_url(url): return None
+    variant = f"{_source_key(url)}@{size}"
+    cached = data_uri(variant)
+    if cached: return cached
+
+    key = _source_key(url)
+    if _recently_failed(key): return None
+    try:
+        original = get(key)
+        if original is None:
+            if is_local(url): return None  # 캐시에서 지워진 로컬 이미지
+            resolve = _resolver(url)
+            original = _download(resolve(url) if resolve else url)
+            put(key, *original)
+        put(variant, *_resize(original[0], original[1], size))
+    except Exception as e:
+        _mark_failed(key)
+        print(f"⚠️ 이미지 준비 실패 ({url[:60]}): {type(e).__name__}")  # 예외 메시지에는 키가 든 주소가 들어갈 수 있음
+        return None
+    return data_uri(variant)
+
+def prefetch(urls, size="thumb"):
+    """여러 이미지를 동시에 준비: {주소: data URI 또는 None}"""
+    urls = list(dict.fromkeys(u for u in urls if is_image_url(u)))
+    if not urls: return {}
+    with ThreadPoolExecutor(max_workers=min(IMAGE_WORKERS, len(urls))) as pool:
+        return dict(zip(urls, pool.map(lambda u: display_uri(u, size), urls)))
@@ -0,0 +1,88 @@
+# jobs.py
+# 백그라운드 DB 업데이트 작업 큐 (프로세스 안 스레드 풀)
+# - 버튼을 눌러도 화면(세션)이 수집이 끝날 때까지 멈추지 않습니다.
+# - 같은 도시 작업이 이미 대기/실행 중이면 새로 만들지 않고 그 작업을 돌려줍니다. (중복 수집 방지)
+# - 진행 상황(끝난 요청 수 / 전체 요청 수, 받은 장소 수, 저장 결과)을 get_job()으로 조회할 수 있습니다.
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import travel_logic as logic
+import cities
+
+JOB_WORKERS = 2          # 동시에 수집하는 도시 수 (요청 동시성은 backend의 제공자별 제한을 따름)
+JOB_HISTORY = 50         # 끝난 작업 기록은 최근 것만 보관
+
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="refresh-job")
+_lock = threading.Lock()
+_jobs = {}               # 작업 ID -> 작업 상태 dict
+_active = {}             # 표준 도시 ID -> 대기/실행 중인 작업 ID ("제주" / "제주도"는 같은 작업)
+_ids = itertools.count(1)
+
+def _new_job(city, styles, force):
+    return {"id": next(_ids), "city": city, "styles": list(styles), "force": force,
+            "status": "queued", "done": 0, "total": 0, "places": 0,
+            "inserted": 0, "updated": 0, "unchanged": 0, "skipped_fresh": 0, "skipped_backoff": 0,
+            "error": None, "created": time.time(), "started": None, "finished": None}
+
+def _update(job_id, **fields):
+    with _lock:
+        _jobs[job_id].update(fields)
+
+def _run(job_id):
+    job = get_job(job_id)
+    _update(job_id, status="running", started=time.time())
+
+    def progress(done, total, places):
+        _update(job_id, done=done, total=total, places=places)
+
+    try:
+        plan = logic.update_db(job['city'], job['styles'], force=job['force'], progress=progress)
+        result = plan.get('result', {})
+        _update(job_id, status="failed" if 'error' in result else "done", error=result.get('error'),
+                inserted=result.get('inserted', 0), updated=result.get('updated', 0),
+                unchanged=result.get('unchanged', 0), skipped_fresh=plan.get('fresh_skipped', 0),
+                skipped_backoff=plan.get('backoff_skipped', 0))
+    except Exception as e:
+        print(f"❌ DB 업데이트 작업 실패 ({job['city']}): {e}")
+        _update(job_id, status="failed", error=str(e))
+    finally:
+        with _lock:
+            _jobs[job_id]['finished'] = time.time()
+            cid = cities.city_id(job['city'])
+            if _active.get(cid) == job_id: del _active[cid]
+
+def _trim_history():
+    finished = [j for j in _jobs.values() if j['finished'] is not None]
+    for j in sorted(finished, key=lambda j: j['finished'])[:max(0, len(finished) - JOB_HISTORY)]:
+        del _jobs[j['id']]
+
+def submit_refresh(city, styles, force=False):
+    """
+    도시 DB 업데이트 작업을 큐에 넣고 작업 상태(사본)를 반환합니다.
+    같은 도시 작업이 이미 대기/실행 중이면 스타일이 달라도 그 작업을 그대로 돌려줍니다.
+    """
+    cid = cities.city_id(city)
+    with _lock:
+        running = _active.get(cid)
+        if running is not None: return dict(_jobs[running])
+        _trim_history()
+        job = _new_job(city, styles, force)
+        _jobs[job['id']] = job
+        _active[cid] = job['id']
+        snapshot = dict(job)
+    _executor.submit(_run, job['id'])
+    return snapshot
+
+def get_job(job_id):
+    """작업 상태 사본 (없으면 None)"""
+    with _lock:
+        job = _jobs.get(job_id)
+        return dict(job) if job else None
+
+def active_job(city):
+    """도시의 대기/실행 중인 작업 (없으면 None)"""
+    with _lock:
+        job_id = _active.get(cities.city_id(city))
+        return dict(_jobs[job_id]) if job_id is not None else None
@@ -0,0 +1,65 @@
+# map_component/__init__.py
+# 일정 지도 커스텀 컴포넌트 (iframe 1개).
+# 같은 key로 호출하면 Streamlit이 iframe을 그대로 두고 새 인자만 메시지로 보내므로,
+# 테마/일차/지도 종류를 바꿔도 SDK를 다시 불러오지 않고 마커와 경로만 다시 그립니다.
+import os
+
+import streamlit.components.v1 as components
+
+_FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+_route_map = components.declare_component("route_map", path=_FRONTEND_DIR)
+
+DEFAULT_CENTER = {"lat": 33.450701, "lng": 126.570667}  # 마커가 없을 때 (기존 카카오 지도 기본값)
+CLUSTER_MIN_MARKERS = 30   # 마커가 이보다 많으면 클러스터로 묶어서 표시
+POLYLINE_PRECISION = 5     # 소수점 5자리 ≈ 1m
+
+# --- 구글 폴리라인 인코딩 (좌표를 이전 점과의 차이로 바꿔 5비트씩 문자로 저장) ---
+def _encode_value(value):
+    value = ~(value << 1) if value < 0 else value << 1
+    chunks = []
+    while value >= 0x20:
+        chunks.append(chr((0x20 | (value & 0x1f)) + 63))
+        value >>= 5
+    chunks.append(chr(value + 63))
+    return "".join(chunks)
+
+def encode_polyline(points, precision=POLYLINE_PRECISION):
+    """[(lat, lng), ...] -> 구글 인코딩 폴리라인 문자열"""
+    factor = 10 ** precision
+    out, prev_lat, prev_lng = [], 0, 0
+    for lat, lng in points:
+        lat, lng = int(round(lat * factor)), int(round(lng * factor))
+        out.append(_encode_value(lat - prev_lat))
+        out.append(_encode_value(lng - prev_lng))
+        prev_lat, prev_lng = lat, lng
+    return "".join(out)
+
+def make_payload(stops):
+    """
+    방문 순서대로의 장소 목록 -> 압축된 지도 데이터.
+    마커 표는 같은 장소를 한 번만 담고(좌표는 인코딩된 폴리라인), 경로는 마커 번호 목록으로 보냅니다.
+    """
+    index, coords, titles, path = {}, [], [], []
+    for s in stops:
+        key = (round(float(s['lat']), POLYLINE_PRECISION), round(float(s['lng']), POLYLINE_PRECISION), s['title'])
+        if key not in index:
+            index[key] = len(coords)
+            coords.append(key[:2])
+            titles.append(s['title'])
+        path.append(index[key])
+    if coords:
+        center = {"lat": sum(c[0] for c in coords) / len(coords), "lng": sum(c[1] for c in coords) / len(coords)}
+    else:
+        center = DEFAULT_CENTER
+    return {"points": encode_polyline(coords), "titles": titles, "path": path,
+            "center": center, "cluster": len(coords) > CLUSTER_MIN_MARKERS}
+
+def route_map(provider, stops, kakao_key="", google_key="", height=400,
+              missing_key_text="지도 키가 없습니다.", key=None):
+    """
+    provider: "kakao" 또는 "google"
+    stops: 방문 순서대로의 [{"lat", "lng", "title"}] (경로는 이 순서대로 그림)
+    """
+    return _route_map(provider=provider, data=make_payload(stops),
+                      keys={"kakao": kakao_key, "google": google_key}, height=height,
+                      missing_key_text=missing_key_text, key=key, default=None)
@@ -1,7 +1,5 @@
 # 파일 위치: pages/2_일정추천출력부.py
 import streamlit as st
-import streamlit.components.v1 as components 
-import json
 from datetime import date, timedelta
 import sys
 import os
@@ -14,6 +12,10 @@ sys.path.append(parent_dir)
 
 import backend 
 import travel_logic as logic  # [핵심] 분리한 로직 파일 import
+import image_cache  # 장소 이미지 썸네일 캐시
+from map_component import route_map  # 지도 (iframe 1개, SDK 한 번만 로딩)
+import jobs  # 백그라운드 DB 업데이트 작업 큐
+import diagnostics  # 단계별 시간 계측 (PICKNGO_DIAG=1 또는 ?diag=1)
 
 # ==========================================
 # 👇 지도 키 설정
@@ -54,78 +56,6 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-# --- 지도 렌더링 함수 (UI 관련이므로 여기에 남김) ---
-def render_kakao_map(markers, path):
-    if not markers: avg_lat, avg_lng = 33.450701, 126.570667
-    else:
-        avg_lat = sum([m['lat'] for m in markers]) / len(markers)
-        avg_lng = sum([m['lng'] for m in markers]) / len(markers)
-    
-    html = f"""
-    <div id="map" style="width:100%;height:400px;border-radius:12px;"></div>
-    <script type="text/javascript" src="//dapi.kakao.com/v2/maps/sdk.js?appkey={KAKAO_MAPS_JS_KEY}"></script>
-    <script>
-        var container = document.getElementById('map');
-        var options = {{ center: new kakao.maps.LatLng({avg_lat}, {avg_lng}), level: 9 }};
-        var map = new kakao.maps.Map(container, options);
-        var markersData = {json.dumps(markers)};
-        var pathData = {json.dumps(path)};
-        
-        if (pathData.length > 0) {{
-            var linePath = pathData.map(p => new kakao.maps.LatLng(p.lat, p.lng));
-            var polyline = new kakao.maps.Polyline({{
-                path: linePath, strokeWeight: 5, strokeColor: '#1A73E8', strokeOpacity: 0.8, strokeStyle: 'solid'
-            }});
-            polyline.setMap(map);
-        }}
-
-        if (markersData.length > 0) {{
-            var bounds = new kakao.maps.LatLngBounds();
-            markersData.forEach((m, i) => {{
-                var position = new kakao.maps.LatLng(m.lat, m.lng);
-                var marker = new kakao.maps.Marker({{ map: map, position: position, title: m.title }});
-                var iw = new kakao.maps.InfoWindow({{ content: '<div style="padding:5px;font-size:12px;color:black;">' + (i+1) + '. ' + m.title + '</div>' }});
-                kakao.maps.event.addListener(marker, 'mouseover', () => iw.open(map, marker));
-                kakao.maps.event.addListener(marker, 'mouseout', () => iw.close());
-                bounds.extend(position);
-            }});
-            if (markersData.length > 1) {{ map.setBounds(bounds); }}
-        }}
-    </script>
-    """
-    return html
-
-def render_google_map(markers, path):
-    if not markers: return "<div style='padding:20px;'>📍 데이터가 없습니다.</div>"
-    avg_lat = sum([m['lat'] for m in markers]) / len(markers)
-    avg_lng = sum([m['lng'] for m in markers]) / len(markers)
-    
-    html = f"""
-    <!DOCTYPE html>
-    <html><head><style>#map {{ height: 400px; width: 100%; border-radius: 12px; }} html,body {{ height:100%; margin:0; }}</style></head><body>
-    <div id="map"></div>
-    <script>
-        function initMap() {{
-            const map = new google.maps.Map(document.getElementById("map"), {{ zoom: 12, center: {{ lat: {avg_lat}, lng: {avg_lng} }} }});
-            const markers = {json.dumps(markers)};
-            const path = {json.dumps(path)};
-            
-            const polyline = new google.maps.Polyline({{ path: path, map: map, strokeColor: "#1A73E8", strokeWeight: 5 }});
-            const bounds = new google.maps.LatLngBounds();
-            
-            markers.forEach((m, i) => {{
-                const pos = {{ lat: m.lat, lng: m.lng }};
-                new google.maps.Marker({{ position: pos, map: map, label: (i+1).toString(), title: m.title }});
-                bounds.extend(pos);
-            }});
-            
-            if (markers.length > 1) {{ map.fitBounds(bounds); }}
-        }}
-    </script>
-    <script src="https://maps.googleapis.com/maps/api/js?key={GOOGLE_MAPS_JS_KEY}&callback=initMap" async defer></script>
-    </body></html>"""
-    return html
-
 # -------------------------------------------------------------
 # ⚠️ 수정된 부분: 로직 함수들 제거함 (check_is_domestic, generate_plans 등)
 # 대신 logic.함수명() 으로 호출합니다.
@@ -144,6 +74,21 @@ elif "user_input" not in st.session_state:
 else:
     data = st.session_state["user_input"]
 
+# --- 진단 모드: 이번 실행의 단계별 시간 / 호출 수를 모아서 아래 패널과 logs/diagnostics.jsonl에 남김 ---
+diag_on = diagnostics.ENABLED or st.query_params.get("diag") == "1"
+# 일정 seed: 같은 조건 + 같은 seed면 같은 일정 (재현 / 캐시용). '다시 추천'은 seed만 하나 올림
+plan_seed = st.session_state.setdefault("plan_seed", 0)
+if diag_on: diagnostics.start_run("results_page", city=data['dest_city'], styles=list(data['style']), seed=plan_seed)
+
+def finish_diagnostics():
+    summary = diagnostics.end_run()
+    if summary: st.session_state["diag_runs"] = (st.session_state.get("diag_runs", []) + [summary])[-5:]
+
+def rerun(**kwargs):
+    # st.rerun()은 예외로 스크립트를 바로 끝내므로 그 전에 이번 실행의 계측을 닫아서 기록
+    finish_diagnostics()
+    st.rerun(**kwargs)
+
 start = data.get('start_date')
 if isinstance(start, str): start = date.fromisoformat(start)
 end = data.get('end_date')
@@ -169,95 +114,153 @@ with col2:
     with c_btn1:
         if st.button("🎲 다시 추천", use_container_width=True):
             if "plans" in st.session_state: del st.session_state["plans"]
-            st.rerun()
+            st.session_state["plan_seed"] = plan_seed + 1
+            st.session_state.pop("refresh_notice", None)
+            rerun()
     with c_btn2:
         if st.button("🔄 DB 업데이트", use_container_width=True):
-            with st.spinner(f"📡 {data['dest_city']} 데이터 수집 중..."):
-                # [호출 수정] logic 모듈 사용
-                logic.update_db(data['dest_city'], data['style'])
-            
-            if "plans" in st.session_state: del st.session_state["plans"]
-            st.rerun()
+            # 백그라운드 작업으로 실행 (최근에 수집한 키워드는 건너뛰는 증분 업데이트)
+            job = jobs.submit_refresh(data['dest_city'], data['style'])
+            st.session_state["refresh_job"] = {"id": job['id'], "user": True}
+            rerun()
+
+# --- DB 업데이트 진행 상황: 작업이 있을 때만 주기적으로 확인 (기존 데이터는 그대로 보여줌) ---
+REFRESH_POLL_SECONDS = 1.0
+refresh_running = jobs.active_job(data['dest_city']) is not None
+
+@st.fragment(run_every=REFRESH_POLL_SECONDS if refresh_running else None)
+def refresh_status():
+    job = jobs.active_job(data['dest_city'])
+    if job is not None:
+        pct = job['done'] / job['total'] if job['total'] else 0.0
+        st.progress(pct, text=f"📡 {data['dest_city']} 데이터 수집 중... 요청 {job['done']}/{job['total'] or '?'}건 · 받은 장소 {job['places']}개")
+        return
+
+    requested = st.session_state.pop("refresh_job", None)
+    if requested is not None:
+        finished = jobs.get_job(requested['id']) or {}
+        changed = finished.get('inserted', 0) + finished.get('updated', 0)
+        if finished.get('status') == "failed":
+            st.session_state["refresh_notice"] = f"❌ 데이터 수집 실패: {finished.get('error')}"
+        elif requested['user']:
+            # 직접 누른 업데이트는 끝나면 새 데이터로 다시 추천
+            st.session_state.pop("plans", None)
+            st.session_state["refresh_notice"] = f"✅ 업데이트 완료: 추가 {finished.get('inserted', 0)}건 / 수정 {finished.get('updated', 0)}건"
+        elif changed:
+            st.session_state["refresh_notice"] = f"🆕 새 데이터 {changed}건이 들어왔습니다. '🎲 다시 추천'을 누르면 반영됩니다."
+    if refresh_running or requested is not None:
+        rerun(scope="app")  # 작업이 끝났으니 폴링을 멈추고 화면 전체 갱신
+    notice = st.session_state.get("refresh_notice")
+    if notice: st.caption(notice)
+
+refresh_status()
 
 if "plans" not in st.session_state:
     with st.spinner("🚀 5초 안에 최적의 동선을 계산합니다..."):
         # [호출 수정] logic 모듈 사용
-        generated = logic.generate_plans(data, duration)
+        # 같은 요청은 캐시 / 미리 계산한 일정(python -m precompute)에서 바로 가져옴
+        with diagnostics.span("page.generate_plans"):
+            generated = logic.get_plans(data, duration, seed=st.session_state["plan_seed"], optimize_routes=True)
         
     if generated:
         st.session_state["plans"] = generated
-        st.rerun()
+        # 저장된 데이터로 먼저 보여주고, 오래된 키워드는 뒤에서 다시 수집
+        if logic.STALE_WHILE_REVALIDATE and "refresh_job" not in st.session_state \
+                and logic.needs_refresh(data['dest_city'], data['style']):
+            job = jobs.submit_refresh(data['dest_city'], data['style'])
+            st.session_state["refresh_job"] = {"id": job['id'], "user": False}
+        rerun()
     else:
-        st.warning("⚠️ 저장된 데이터가 없습니다. 우측 상단 '🔄 DB 업데이트' 버튼을 눌러주세요!")
+        if not refresh_running:
+            st.warning("⚠️ 저장된 데이터가 없습니다. 우측 상단 '🔄 DB 업데이트' 버튼을 눌러주세요!")
 
 if "plans" in st.session_state:
     plans = st.session_state["plans"]
-    tabs = st.tabs([p['theme'] for p in plans])
-    
-    for i, tab in enumerate(tabs):
-        plan = plans[i]
-        with tab:
+    # 테마 선택: 지도는 하나만 두고 선택한 테마의 마커/경로만 보냅니다.
+    theme_names = [p['theme'] for p in plans]
+    selected_theme = st.radio("테마", theme_names, horizontal=True, key="theme_sel", label_visibility="collapsed")
+    plan = plans[theme_names.index(selected_theme)] if selected_theme in theme_names else plans[0]
+    # 카드 이미지: 선택한 테마에서 처음 보는 이미지만 동시에 받아서 80x80으로 줄이고, 세션 동안 data URI로 재사용
+    thumbs = st.session_state.setdefault("thumbs", {})
+    missing = [p['img'] for d in plan['days'] for p in d['places'] if p['img'] and p['img'] not in thumbs]
+    if missing:
+        with diagnostics.span("page.thumbnails", rows=len(missing)):
+            thumbs.update(image_cache.prefetch(missing, "thumb"))
+
+    route_html = ""
+    if plan.get('route_km'):
+        route_html = f"<span style='color:#666;'>| 🚗 총 이동거리 {plan['route_km']['after']}km (최적화 전 {plan['route_km']['before']}km)</span>"
+    st.markdown(f"""
+    <div style="padding:10px 0; display:flex; align-items:center; gap:10px;">
+        <span style="font-size:1.1rem; font-weight:bold;">🎯 추천 적합도: <span style="color:#1a73e8;">{plan['score']}%</span></span>
+        <span style="color:#666;">| {plan['desc']}</span>
+        {route_html}
+    </div>
+    """, unsafe_allow_html=True)
+
+    day_options = ["전체 동선"] + [f"{d['day']}일차" for d in plan['days']]
+    map_col1, map_col2 = st.columns([8, 2])
+    with map_col1:
+        selected_day_label = st.radio("📅 지도에 표시할 일정", day_options, horizontal=True, key="day_sel", label_visibility="collapsed")
+    if selected_day_label not in day_options: selected_day_label = "전체 동선"
+    with map_col2:
+        if is_korea:
+            map_type = st.radio("지도 선택", ["Kakao Map", "Google Map"], horizontal=True, label_visibility="collapsed", key="map_sel")
+        else:
+            map_type = "Google Map"
+            st.caption(f"🌍 {data['dest_city']} 지역은 Google Maps로 표시됩니다.")
+
+    map_stops = []  # 방문 순서대로 (마커 표/경로 번호는 컴포넌트에서 만듦)
+
+    if selected_day_label == "전체 동선":
+        target_days = plan['days']
+    else:
+        target_day_num = int(selected_day_label.replace("일차", ""))
+        target_days = [d for d in plan['days'] if d['day'] == target_day_num]
+
+    for d in target_days:
+        for p in d['places']:
+            if p['lat'] and p['lng']:
+                map_stops.append({"lat": p['lat'], "lng": p['lng'], "title": p['name']})
+
+    # 같은 key로 호출하므로 재실행돼도 iframe/SDK는 그대로이고 오버레이만 다시 그립니다.
+    route_map("google" if map_type == "Google Map" else "kakao", map_stops,
+              kakao_key=KAKAO_MAPS_JS_KEY, google_key=GOOGLE_MAPS_JS_KEY, height=400,
+              missing_key_text="⚠️ 지도를 보려면 지도 JS Key를 입력해주세요.", key="route_map")
+
+    st.divider()
+
+    # --- 카드 리스트 출력 ---
+    for day in plan['days']:
+        st.caption(f"📅 Day {day['day']}")
+        if not day['places']: st.info("일정이 비어있습니다.")
+        for place in day['places']:
+            img_src = thumbs.get(place['img'])
+            img_html = (f"<img src='{img_src}' style='width:80px; height:80px; object-fit:cover; border-radius:8px;'>" if img_src
+                        else "<div style='width:80px; height:80px; flex-shrink:0; border-radius:8px; background:#f1f3f4;'></div>")
+            # [호출 수정] logic 모듈 사용
+            booking_url = logic.get_booking_url(place['name']) 
+            
             st.markdown(f"""
-            <div style="padding:10px 0; display:flex; align-items:center; gap:10px;">
-                <span style="font-size:1.1rem; font-weight:bold;">🎯 추천 적합도: <span style="color:#1a73e8;">{plan['score']}%</span></span>
-                <span style="color:#666;">| {plan['desc']}</span>
+            <div class="place-card">
+                <div class="place-time">{place['time']}<br><small style="color:#888;">{place['type']}</small></div>
+                {img_html}
+                <div class="place-info">
+                    <div class="place-name">
+                        <a href="{place['url']}" target="_blank" style="color:#333;text-decoration:none;">{place['name']}</a>
+                    </div>
+                    <div class="place-desc">{place['desc']}</div>
+                    <a href="{booking_url}" target="_blank" class="booking-btn">📅 예약/상세보기</a>
+                </div>
             </div>
             """, unsafe_allow_html=True)
-            
-            day_options = ["전체 동선"] + [f"{d['day']}일차" for d in plan['days']]
-            selected_day_label = st.radio("📅 지도에 표시할 일정", day_options, horizontal=True, key=f"day_sel_{i}", label_visibility="collapsed")
 
-            map_markers = []
-            map_path = []
-            
-            if selected_day_label == "전체 동선":
-                target_days = plan['days']
-            else:
-                target_day_num = int(selected_day_label.replace("일차", ""))
-                target_days = [d for d in plan['days'] if d['day'] == target_day_num]
-            
-            for d in target_days:
-                for p in d['places']:
-                    if p['lat'] and p['lng']:
-                        map_markers.append({"lat": p['lat'], "lng": p['lng'], "title": p['name']})
-                        map_path.append({"lat": p['lat'], "lng": p['lng']})
-            
-            if is_korea:
-                map_col1, map_col2 = st.columns([8, 2])
-                with map_col2:
-                    map_type = st.radio("지도 선택", ["Kakao Map", "Google Map"], horizontal=True, label_visibility="collapsed", key=f"map_sel_{i}")
-                
-                if map_type == "Google Map":
-                    if GOOGLE_MAPS_JS_KEY: components.html(render_google_map(map_markers, map_path), height=400)
-                    else: st.warning("Google Maps JS Key가 없습니다.")
-                else:
-                    components.html(render_kakao_map(map_markers, map_path), height=400)
-            else:
-                st.caption(f"🌍 {data['dest_city']} 지역은 Google Maps로 표시됩니다.")
-                if GOOGLE_MAPS_JS_KEY: components.html(render_google_map(map_markers, map_path), height=400)
-                else: st.warning("⚠️ 지도를 보려면 Google Maps JS Key를 입력해주세요.")
-            
-            st.divider()
-            
-            # --- 카드 리스트 출력 ---
-            for day in plan['days']:
-                st.caption(f"📅 Day {day['day']}")
-                if not day['places']: st.info("일정이 비어있습니다.")
-                for place in day['places']:
-                    img_html = f"<img src='{place['img']}' style='width:80px; height:80px; object-fit:cover; border-radius:8px;'>" if place['img'] else ""
-                    # [호출 수정] logic 모듈 사용
-                    booking_url = logic.get_booking_url(place['name']) 
-                    
-                    st.markdown(f"""
-                    <div class="place-card">
-                        <div class="place-time">{place['time']}<br><small style="color:#888;">{place['type']}</small></div>
-                        {img_html}
-                        <div class="place-info">
-                            <div class="place-name">
-                                <a href="{place['url']}" target="_blank" style="color:#333;text-decoration:none;">{place['name']}</a>
-                            </div>
-                            <div class="place-desc">{place['desc']}</div>
-                            <a href="{booking_url}" target="_blank" class="booking-btn">📅 예약/상세보기</a>
-                        </div>
-                    </div>
-                    """, unsafe_allow_html=True)
\ No newline at end of file
+# --- 진단 패널 (진단 모드일 때만) ---
+finish_diagnostics()
+if diag_on and st.session_state.get("diag_runs"):
+    with st.expander("🔧 진단 정보 (최근 실행)", expanded=False):
+        for run in reversed(st.session_state["diag_runs"]):
+            st.caption(f"{run['time']} · {run['label']} · 전체 {run['total_ms']}ms")
+            st.dataframe([{"구간": name, "시간(ms)": v['ms'], "호출": v['calls'], "행 수": v['rows']}
+                          for name, v in run['spans'].items()], use_container_width=True, hide_index=True)
+            if run['counters']: st.json(run['counters'], expanded=False)
@@ -0,0 +1,64 @@
+# place_classifier.py
+# 장소 분류기: 스타일 태그(휴양/관광/...)와 일정 버킷(food/sight/hotel)을
+# 미리 컴파일한 정규식으로 한 번에 판별합니다. 수집(저장) 시점에 한 번만 실행해서 DB에 같이 저장합니다.
+import re
+
+STYLE_KEYWORDS = {
+    "휴양": ["beach", "park", "nature", "resort", "해변", "공원", "휴양", "산책"],
+    "힐링": ["forest", "garden", "spa", "relax", "숲", "정원", "온천", "힐링"],
+    "관광": ["tourist", "museum", "landmark", "sight", "관광", "박물관", "명소", "유적"],
+    "맛집": ["food", "restaurant", "meal", "dish", "식당", "음식", "요리", "맛집"],
+    "쇼핑": ["shopping", "mall", "market", "store", "쇼핑", "시장", "몰", "백화점"],
+    "자연": ["nature", "mountain", "lake", "hiking", "자연", "산", "호수", "등산"]
+}
+FOOD_KEYWORDS = ['음식', '식당', '카페', 'food', 'restaurant', 'cafe', 'bakery', 'meal', 'bar', 'pub']
+HOTEL_KEYWORDS = ['hotel', 'motel', 'resort', 'pension', '숙소', '호텔', '리조트', '펜션']
+
+def _compile(keywords):
+    # 키워드 목록 -> 대안(|) 정규식 하나 (문자열을 한 번만 훑음)
+    return re.compile("|".join(re.escape(k) for k in keywords))
+
+STYLE_PATTERNS = {style: _compile(kws) for style, kws in STYLE_KEYWORDS.items()}
+FOOD_PATTERN = _compile(FOOD_KEYWORDS)
+HOTEL_PATTERN = _compile(HOTEL_KEYWORDS)
+
+def style_text(place):
+    return str(place.get('category', '')).lower() + " " + str(place.get('name', '')).lower()
+
+def bucket_of(place):
+    """일정 슬롯 종류: 카테고리 기준 food / hotel / sight"""
+    cat = str(place.get('category', '')).lower()
+    if FOOD_PATTERN.search(cat): return "food"
+    if HOTEL_PATTERN.search(cat): return "hotel"
+    return "sight"
+
+def styles_of(place):
+    """등록된 모든 스타일 중 장소에 해당하는 스타일 목록"""
+    text = style_text(place)
+    return [style for style, pattern in STYLE_PATTERNS.items() if pattern.search(text)]
+
+def classify(place):
+    """장소에 bucket / style_tags 필드를 채워서 반환 (수집 시점에 호출)"""
+    place['bucket'] = bucket_of(place)
+    place['style_tags'] = ",".join(styles_of(place))
+    return place
+
+def matched_styles(place, user_styles):
+    """
+    사용자가 고른 스타일 중 장소에 해당하는 것.
+    저장된 style_tags가 있으면 그대로 쓰고, 등록되지 않은 스타일(예: 액티비티)은 이름 자체로 검색합니다.
+    """
+    stored = place.get('style_tags')
+    if place.get('bucket') and isinstance(stored, str):
+        tags = set(stored.split(","))
+    else:
+        tags = set(styles_of(place))
+    text = None
+    matched = []
+    for style in user_styles:
+        if style in STYLE_PATTERNS:
+            if style in tags: matched.append(style)
+        else:
+            if text is None: text = style_text(place)
+            if style in text: matched.append(style)
+    return matched
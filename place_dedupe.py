@@ -0,0 +1,168 @@
+# place_dedupe.py
+# 비슷한 장소 합치기: 같은 장소가 구글/카카오/TourAPI/아마데우스에서 이름이 조금씩 다르게 들어온 경우
+# ("성산일출봉" vs "성산 일출봉 (UNESCO)")를 하나로 묶습니다.
+#   1) 블로킹: MAX_DUP_DISTANCE_KM 크기의 격자 칸 + 주변 칸 안의 장소끼리만 비교
+#   2) 칸 안에서도 드문 trigram 앞부분(prefix filter)을 공유하는 후보만 비교
+#      (유사도 기준을 넘으려면 공유해야 하는 최소 조각 수 t가 있으므로, 드문 순서로 정렬한 조각 중
+#       앞의 |조각| - t + 1개 안에서 반드시 하나는 겹침 -> "공원", "카페" 같은 흔한 조각은 색인하지 않음)
+#   3) 이름 유사도 + 실제 거리 조건을 모두 만족하면 같은 장소로 판단
+#   4) 체인 지점("스타벅스 강남점" vs "스타벅스 강남역점")이나 번호가 다른 이름("2호점")은 합치지 않음
+# 모든 쌍을 비교하지 않으므로 장소가 수만 개여도 빠르게 동작합니다.
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+MAX_DUP_DISTANCE_KM = 0.3   # 이 거리 안에 있어야 같은 장소 후보 (격자 칸 크기도 이 값)
+NAME_JACCARD_MIN = 0.5      # 3글자 조각 자카드 유사도 기준
+NAME_CONTAIN_MIN = 0.85     # 짧은 이름의 조각이 긴 이름에 포함된 비율 기준
+CONTAIN_MIN_LENGTH = 4      # 포함 비율은 이름이 이 길이 이상일 때만 사용 ("카페" 같은 짧은 이름 오탐 방지)
+CONTAIN_MAX_RATIO = 1.5     # 긴 이름이 짧은 이름의 이 배수보다 길면 다른 장소로 봄 ("성산일출봉" vs "성산일출봉주차장")
+NAME_MIN_LENGTH = 2         # 이보다 짧은 이름은 길이 비율 검사 없이 자카드만 사용
+KM_PER_DEG = 111.32         # 위도 1도 거리(km)
+
+_BRACKETS = re.compile(r"[\(\[\{（【].*?[\)\]\}）】]")
+_DIGITS = re.compile(r"\d+")
+_BRANCH_SUFFIXES = ("점", "branch")  # 지점 이름 끝 ("강남점", "2호점", "Gangnam Branch")
+
+# --- 격자: 위도는 고정 간격, 경도는 행(위도 띠)마다 cos(위도)로 보정해서 칸 하나가 약 0.3km x 0.3km ---
+CELL_LAT = MAX_DUP_DISTANCE_KM / KM_PER_DEG
+
+@lru_cache(maxsize=None)
+def _cell_lng(row):
+    # 행 안에서 적도에서 가장 먼 위도 기준 (칸이 반경보다 좁아지지 않도록)
+    lat = min(89.0, max(abs(row * CELL_LAT - 90.0), abs((row + 1) * CELL_LAT - 90.0)))
+    return MAX_DUP_DISTANCE_KM / (KM_PER_DEG * math.cos(math.radians(lat)))
+
+def grid_cell(lat, lng):
+    """좌표 -> 격자 칸 (행, 열)"""
+    row = int((lat + 90.0) // CELL_LAT)
+    return row, int((lng + 180.0) // _cell_lng(row))
+
+def nearby_cells(lat, lng):
+    """MAX_DUP_DISTANCE_KM 안의 점이 들어 있을 수 있는 모든 칸 (위아래 행 포함, 보통 9칸)"""
+    row = int((lat + 90.0) // CELL_LAT)
+    reach = MAX_DUP_DISTANCE_KM / (KM_PER_DEG * math.cos(math.radians(min(89.0, abs(lat) + 2 * CELL_LAT))))
+    cells = []
+    for r in (row - 1, row, row + 1):
+        width = _cell_lng(r)
+        first, last = int((lng - reach + 180.0) // width), int((lng + reach + 180.0) // width)
+        cells.extend((r, c) for c in range(first, last + 1))
+    return cells
+
+def normalize_name(name):
+    """괄호 안 부가 설명을 빼고, 글자/숫자만 소문자로"""
+    name = _BRACKETS.sub("", str(name))
+    return ''.join(filter(str.isalnum, name)).lower()
+
+def trigrams(text):
+    if len(text) < 3: return {text} if text else set()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+def _branch(raw_name):
+    """지점 표기("강남점", "제주공항2호점")가 있으면 마지막 단어, 없으면 None"""
+    words = _BRACKETS.sub("", str(raw_name)).lower().split()
+    if len(words) < 2: return None
+    last = ''.join(filter(str.isalnum, words[-1]))
+    return last if last.endswith(_BRANCH_SUFFIXES) else None
+
+def name_key(raw_name):
+    """비교용 정보: (정규화 이름, trigram, 숫자들, 지점 표기)"""
+    name = normalize_name(raw_name)
+    return name, trigrams(name), tuple(_DIGITS.findall(name)), _branch(raw_name)
+
+def _min_common(size, length):
+    """이 이름과 유사하다고 판단되려면 상대가 누구든 공유해야 하는 최소 trigram 수 (prefix 길이 계산용)"""
+    need = math.ceil(NAME_JACCARD_MIN * size)
+    if length >= CONTAIN_MIN_LENGTH:
+        # 포함 비율 기준: 상대 이름은 길이 비율 제한 때문에 이 길이 이상
+        partner = max(CONTAIN_MIN_LENGTH, math.ceil(length / CONTAIN_MAX_RATIO))
+        need = min(need, math.ceil(NAME_CONTAIN_MIN * min(size, partner - 2)))
+    return max(1, need)
+
+def _similar(common, size_a, size_b, len_a, len_b):
+    if not size_a or not size_b: return False
+    short, long_ = sorted((len_a, len_b))
+    if short >= NAME_MIN_LENGTH and long_ > short * CONTAIN_MAX_RATIO: return False  # 길이가 너무 다르면 다른 장소
+    if common / (size_a + size_b - common) >= NAME_JACCARD_MIN: return True
+    if short >= CONTAIN_MIN_LENGTH:
+        return common / min(size_a, size_b) >= NAME_CONTAIN_MIN
+    return False
+
+def _same_branch(key_a, key_b):
+    """번호가 다르거나 서로 다른 지점 표기면 다른 장소 ("CU 제주공항점" vs "CU 제주공항2호점")"""
+    if key_a[2] != key_b[2]: return False
+    if key_a[3] and key_b[3] and key_a[3] != key_b[3]: return False
+    return True
+
+def name_similar(a, b):
+    """원래 이름 두 개가 같은 장소 이름으로 보이는지 (거리 조건 제외)"""
+    key_a, key_b = name_key(a), name_key(b)
+    common = len(key_a[1] & key_b[1])
+    return _same_branch(key_a, key_b) and _similar(common, len(key_a[1]), len(key_b[1]), len(key_a[0]), len(key_b[0]))
+
+def _distance_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (lat1, lng1, lat2, lng2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(min(1.0, a)))
+
+def _coords(place):
+    try:
+        lat, lng = float(place.get('lat')), float(place.get('lng'))
+    except (TypeError, ValueError):
+        return None
+    if not lat or not lng: return None
+    return lat, lng
+
+def merge_near_duplicates(places):
+    """
+    places는 우선순위(이미지 있음 > 평점) 순으로 정렬되어 있어야 합니다.
+    같은 장소로 묶인 그룹에서는 가장 앞(우선순위가 높은) 장소 하나만 남깁니다.
+    """
+    parent = list(range(len(places)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    # 이름 정보 + trigram 빈도 (드문 조각부터 정렬하기 위해)
+    info = []
+    frequency = Counter()
+    for p in places:
+        key = name_key(p.get('name', ''))
+        info.append((_coords(p), key))
+        frequency.update(key[1])
+
+    # 칸별 역색인: 격자 칸 -> trigram -> 장소 인덱스 목록 (장소마다 드문 조각 앞부분만 색인)
+    index = {}
+    for i, (coords, key) in enumerate(info):
+        name, grams = key[0], key[1]
+        if coords is None or not grams: continue
+        ordered = sorted(grams, key=lambda g: (frequency[g], g))
+        prefix = ordered[:len(grams) - _min_common(len(grams), len(name)) + 1]
+
+        # 이미 색인된(우선순위가 더 높은) 장소 중 드문 조각을 공유하는 후보만 비교
+        candidates = set()
+        for cell in nearby_cells(*coords):
+            cell_index = index.get(cell)
+            if not cell_index: continue
+            for g in cell_index.keys() & prefix:
+                candidates.update(cell_index[g])
+        for j in candidates:
+            c2, key2 = info[j]
+            if find(i) == find(j) or not _same_branch(key, key2): continue
+            name2, grams2 = key2[0], key2[1]
+            if not _similar(len(grams & grams2), len(grams), len(grams2), len(name), len(name2)): continue
+            if _distance_km(*coords, *c2) <= MAX_DUP_DISTANCE_KM:
+                # 인덱스가 작은(우선순위가 높은) 쪽을 대표로
+                ri, rj = find(i), find(j)
+                parent[max(ri, rj)] = min(ri, rj)
+
+        cell_index = index.setdefault(grid_cell(*coords), {})
+        for g in prefix:
+            cell_index.setdefault(g, []).append(i)
+
+    # 대표는 그룹 안에서 항상 가장 앞의 장소
+    return [p for i, p in enumerate(places) if find(i) == i]
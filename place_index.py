@@ -0,0 +1,106 @@
+# place_index.py
+# 메모리 장소 색인 (열 배열 구조): 표준 도시 ID -> 도시 하나의 장소 열(column) 배열
+# - 도시별로 한 번만 DB에서 읽어 열마다 NumPy 배열로 보관 (평점 내림차순 정렬)
+# - 조회는 dict 한 번 + 배열 자르기: limit은 앞에서 자르기, 카테고리는 미리 만든 행 번호 배열
+# - 조회 결과는 새 dict 목록이 아니라 열 배열을 가리키는 뷰(PlaceView). 행을 꺼낼 때만 dict를 만듭니다.
+# 데이터 버전(backend의 도시별 변경 횟수)이 바뀐 도시는 다음 조회 때 다시 읽습니다.
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+NUMERIC_COLUMNS = ("lat", "lng", "rating")
+INDEX_MAX_CITIES = 64    # 메모리에 올려 두는 도시 수 (오래 안 쓴 도시부터 내림)
+
+class CityPlaces:
+    """도시 하나의 장소 열 배열 (읽기 전용). rows는 평점 내림차순으로 넘겨야 합니다."""
+
+    def __init__(self, columns, rows):
+        self.columns = list(columns)
+        self.size = len(rows)
+        self.data = {}
+        for pos, name in enumerate(self.columns):
+            if name in NUMERIC_COLUMNS:
+                arr = np.array([float(r[pos] or 0) for r in rows], dtype=np.float64)
+            else:
+                arr = np.empty(self.size, dtype=object)
+                arr[:] = [r[pos] for r in rows]
+            arr.flags.writeable = False
+            self.data[name] = arr
+        # 카테고리 -> 행 번호 (오름차순 = 평점순)
+        self.by_category = {}
+        for i, cat in enumerate(self.data.get("category", ())):
+            self.by_category.setdefault(cat, []).append(i)
+        self.by_category = {k: np.array(v, dtype=np.int64) for k, v in self.by_category.items()}
+
+    def select(self, category_filter=None, limit=None):
+        """조건에 맞는 행의 뷰 (평점순)"""
+        if category_filter:
+            cats = [category_filter] if isinstance(category_filter, str) else list(category_filter)
+            parts = [self.by_category[c] for c in cats if c in self.by_category]
+            rows = np.sort(np.concatenate(parts)) if len(parts) > 1 else (parts[0] if parts else np.empty(0, dtype=np.int64))
+            return PlaceView(self, rows[:limit] if limit else rows)
+        return PlaceView(self, slice(0, min(int(limit), self.size) if limit else self.size))
+
+class PlaceView:
+    """
+    CityPlaces의 일부 행을 가리키는 뷰. 시퀀스처럼 len() / 인덱스 / for 가 되고 행은 dict로 꺼내집니다.
+    column(name)은 행 dict를 만들지 않고 열 배열을 바로 돌려줍니다. (정렬, 중복 제거 등 열 단위 계산용)
+    """
+
+    def __init__(self, city, rows):
+        self._city = city
+        self._rows = rows  # slice 또는 행 번호 배열
+
+    def __len__(self):
+        if isinstance(self._rows, slice): return len(range(*self._rows.indices(self._city.size)))
+        return len(self._rows)
+
+    def _position(self, i):
+        if isinstance(self._rows, slice): return range(*self._rows.indices(self._city.size))[i]
+        return int(self._rows[i])
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            positions = np.arange(self._city.size)[self._rows][i]
+            return PlaceView(self._city, positions)
+        pos = self._position(i)
+        row = {}
+        for name, arr in self._city.data.items():
+            value = arr[pos]
+            row[name] = float(value) if name in NUMERIC_COLUMNS else value
+        return row
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def column(self, name):
+        """열 배열 (slice면 복사 없는 뷰, 행 번호면 그 행만 모은 배열)"""
+        return self._city.data[name][self._rows]
+
+class PlaceIndex:
+    """표준 도시 ID -> (데이터 버전, CityPlaces). 여러 세션이 함께 씁니다."""
+
+    def __init__(self, max_cities=INDEX_MAX_CITIES):
+        self.max_cities = max_cities
+        self._cities = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, cid, version):
+        with self._lock:
+            entry = self._cities.get(cid)
+            if entry is None or entry[0] != version: return None
+            self._cities.move_to_end(cid)
+            return entry[1]
+
+    def put(self, cid, version, city):
+        with self._lock:
+            self._cities[cid] = (version, city)
+            self._cities.move_to_end(cid)
+            while len(self._cities) > self.max_cities:
+                self._cities.popitem(last=False)
+        return city
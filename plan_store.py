@@ -0,0 +1,85 @@
+# plan_store.py
+# 미리 계산한 후보군 / 일정 저장소 (로컬 SQLite 파일, python -m precompute 가 채움)
+# - 후보군: (도시 ID, 스타일) -> prepare_pool 결과 (중복 제거 + 점수 + 분류 + 거리 엔진)
+# - 일정: (도시 ID, 스타일, 여행 일수, seed) -> generate_plans 결과 (JSON)
+# 모두 데이터 버전과 함께 저장하고, 읽을 때 현재 DB 버전과 다르면 없는 것으로 취급합니다.
+# 결과 페이지는 계산하기 전에 여기부터 봅니다. (인기 도시는 첫 사용자도 기다리지 않음)
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+PLAN_STORE_PATH = os.environ.get("PLAN_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "plan_cache.db"))
+
+_local = threading.local()
+
+def _conn():
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        conn = sqlite3.connect(PLAN_STORE_PATH, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pools (
+                city_id TEXT, styles TEXT, version TEXT, created REAL, data BLOB,
+                PRIMARY KEY (city_id, styles)
+            );
+            CREATE TABLE IF NOT EXISTS plans (
+                city_id TEXT, styles TEXT, duration INTEGER, seed INTEGER, version TEXT, created REAL, plans TEXT,
+                PRIMARY KEY (city_id, styles, duration, seed)
+            );
+        """)
+        _local.conn = conn
+    return conn
+
+def styles_key(styles):
+    """스타일 목록 -> 저장 키 (순서 무관)"""
+    return "|".join(sorted(styles))
+
+# --- 후보군 (pickle: 이 프로그램이 직접 만든 로컬 파일만 읽습니다) ---
+def save_pool(cid, styles, version, entry):
+    data = pickle.dumps(entry, protocol=pickle.HIGHEST_PROTOCOL)
+    conn = _conn()
+    with conn:
+        conn.execute("INSERT OR REPLACE INTO pools VALUES (?, ?, ?, ?, ?)", (cid, styles_key(styles), version, time.time(), data))
+
+def load_pool(cid, styles, version):
+    """저장된 후보군 (없거나 데이터 버전이 다르면 None)"""
+    try:
+        row = _conn().execute("SELECT version, data FROM pools WHERE city_id=? AND styles=?", (cid, styles_key(styles))).fetchone()
+        if row is None or row[0] != version: return None
+        return pickle.loads(row[1])
+    except Exception as e:  # 저장소가 없거나 깨져도 계산해서 쓰면 되므로 경고만
+        print(f"⚠️ 저장된 후보군 읽기 실패: {type(e).__name__}")
+        return None
+
+# --- 일정 ---
+def save_plans(cid, styles, duration, seed, version, plans):
+    conn = _conn()
+    key = (cid, styles_key(styles), int(duration))
+    with conn:
+        # 데이터 버전이 바뀐 예전 일정은 같이 지움
+        conn.execute("DELETE FROM plans WHERE city_id=? AND styles=? AND duration=? AND version != ?", key + (version,))
+        conn.execute("INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?, ?, ?)",
+                     key + (int(seed), version, time.time(), json.dumps(plans, ensure_ascii=False)))
+
+def load_plans(cid, styles, duration, version, seed=None):
+    """저장된 일정 (seed가 None이면 가장 작은 seed). 없거나 버전이 다르면 None"""
+    sql = "SELECT plans FROM plans WHERE city_id=? AND styles=? AND duration=? AND version=?"
+    params = [cid, styles_key(styles), int(duration), version]
+    if seed is not None:
+        sql += " AND seed=?"
+        params.append(int(seed))
+    try:
+        row = _conn().execute(sql + " ORDER BY seed LIMIT 1", params).fetchone()
+        return json.loads(row[0]) if row else None
+    except Exception as e:
+        print(f"⚠️ 저장된 일정 읽기 실패: {type(e).__name__}")
+        return None
+
+def stats():
+    """저장된 후보군 / 일정 개수"""
+    conn = _conn()
+    return {"pools": conn.execute("SELECT COUNT(*) FROM pools").fetchone()[0],
+            "plans": conn.execute("SELECT COUNT(*) FROM plans").fetchone()[0]}
@@ -0,0 +1,91 @@
+# precompute.py
+# 인기 도시 일정 미리 계산 (화면 없이 실행, 야간 DB 업데이트 뒤에 돌리는 용도)
+# 결과 페이지와 같은 travel_logic 파이프라인으로
+#   1) (도시 x 스타일 조합)별 후보군(prepare_pool)을 만들어 plan_store에 저장하고
+#   2) (도시 x 스타일 조합 x 여행 일수 x seed)별 일정(generate_plans)을 만들어 저장합니다.
+# 결과 페이지는 계산하기 전에 plan_store부터 읽으므로 첫 사용자도 바로 일정을 봅니다.
+# 실행: python -m precompute --cities 제주 부산 --styles 맛집,힐링 액티비티 --durations 2 3 4
+#                            [--seeds 3] [--workers 4] [--refresh]
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import backend
+import cities
+import plan_store
+import travel_logic as logic
+
+DEFAULT_CITIES = ["제주", "부산", "서울", "강릉", "경주", "여수"]
+DEFAULT_STYLES = ["맛집,힐링", "맛집,관광", "힐링", "액티비티"]
+DEFAULT_DURATIONS = [1, 2, 3, 4, 5]
+
+def build_pool(city, styles):
+    """후보군 계산 + 저장 -> 장소 수 (데이터가 없으면 0)"""
+    started = time.perf_counter()
+    version = backend.get_data_version(city)
+    entry = logic.prepare_pool(city, styles)
+    if entry['places']: plan_store.save_pool(cities.city_id(city), styles, version, entry)
+    return len(entry['places']), time.perf_counter() - started
+
+def build_plans(city, styles, duration, seeds):
+    """seed별 일정 계산 + 저장 -> 저장한 일정 수 (후보군은 위에서 저장한 것을 읽음)"""
+    started = time.perf_counter()
+    version = backend.get_data_version(city)
+    data = {"dest_city": cities.display_name(cities.city_id(city)), "style": styles}
+    saved = 0
+    for seed in range(seeds):
+        # 동선 개선은 횟수 제한이라 화면에서 계산한 것과 같은 일정 (같은 지문에 다른 동선이 저장되지 않음)
+        plans = logic.generate_plans(data, duration, optimize_routes=True, seed=seed)
+        if not plans: break
+        plan_store.save_plans(cities.city_id(city), styles, duration, seed, version, plans)
+        saved += 1
+    return saved, time.perf_counter() - started
+
+def _run(executor, jobs):
+    """(설명, 함수, 인자) 목록을 풀에서 실행하고 진행 상황 출력 -> 실패 수"""
+    futures = {executor.submit(fn, *args): label for label, fn, args in jobs}
+    failed = 0
+    for done, future in enumerate(as_completed(futures), 1):
+        label = futures[future]
+        try:
+            count, elapsed = future.result()
+            print(f"[{done}/{len(futures)}] ✅ {label}: {count}개 ({elapsed:.1f}초)")
+        except Exception as e:
+            failed += 1
+            print(f"[{done}/{len(futures)}] ❌ {label}: {e}")
+    return failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m precompute", description="인기 도시 후보군 / 일정 미리 계산")
+    parser.add_argument("--cities", nargs="+", default=DEFAULT_CITIES)
+    parser.add_argument("--styles", nargs="+", default=DEFAULT_STYLES, help="스타일 조합 (쉼표로 구분, 예: 맛집,힐링)")
+    parser.add_argument("--durations", type=int, nargs="+", default=DEFAULT_DURATIONS, help="여행 일수")
+    parser.add_argument("--seeds", type=int, default=3, help="조합마다 만들어 둘 일정 수 (seed 0부터)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--refresh", action="store_true", help="계산 전에 도시별 DB 업데이트(증분)부터 실행")
+    args = parser.parse_args(argv)
+
+    combos = [[s.strip() for s in combo.split(",") if s.strip()] for combo in args.styles]
+    backend.init_db()
+    if args.refresh:
+        for city in args.cities:
+            styles = sorted({s for combo in combos for s in combo})
+            result = logic.update_db(city, styles).get('result', {})
+            print(f"🔄 {city}: 추가 {result.get('inserted', 0)} / 수정 {result.get('updated', 0)}")
+
+    started = time.perf_counter()
+    # 워커는 깨끗한 프로세스로 (DB 커넥션 / 스레드를 부모에게서 물려받지 않도록)
+    with ProcessPoolExecutor(max_workers=max(1, args.workers), mp_context=multiprocessing.get_context("spawn")) as executor:
+        failed = _run(executor, [(f"후보군 {city} {'+'.join(styles)}", build_pool, (city, styles))
+                                 for city in args.cities for styles in combos])
+        failed += _run(executor, [(f"일정 {city} {'+'.join(styles)} {d}일", build_plans,
+                                   (city, styles, d, args.seeds))
+                                  for city in args.cities for styles in combos for d in args.durations])
+    print(f"⏱️ {time.perf_counter() - started:.1f}초 · 저장소 {plan_store.stats()} ({plan_store.PLAN_STORE_PATH})")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,5 @@
+# 루트 모듈(place_dedupe, backend 등)을 테스트에서 바로 import 할 수 있도록
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
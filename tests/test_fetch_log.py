@@ -0,0 +1,69 @@
+# 수집 기록: 실패한 요청의 재시도 대기(backoff) / 성공하면 실패 기록 지우기
+import time
+
+import pytest
+
+import backend
+import travel_logic as logic
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    store = backend.SQLitePlaceStore(str(tmp_path / "places.db"))
+    store.init()
+    monkeypatch.setattr(backend, "get_store", lambda: store)
+    monkeypatch.setattr(backend, "provider_enabled", lambda source: source == "google")
+    return store
+
+def test_failure_backs_off_and_doubles(store):
+    store.mark_failed([("제주도", "google", "맛집")])
+    last, retry_after = store.fetch_times("제주")[("google", "맛집")]
+    assert last is None
+    assert retry_after == pytest.approx(time.time() + backend.FETCH_RETRY_BASE, abs=5)
+
+    store.mark_failed([("제주", "google", "맛집")])
+    _, retry_after = store.fetch_times("제주")[("google", "맛집")]
+    assert retry_after == pytest.approx(time.time() + 2 * backend.FETCH_RETRY_BASE, abs=5)
+
+def test_backoff_is_capped_at_ttl(store):
+    for _ in range(20): store.mark_failed([("제주", "google", "맛집")])
+    _, retry_after = store.fetch_times("제주")[("google", "맛집")]
+    assert retry_after == pytest.approx(time.time() + backend.FETCH_TTL, abs=5)
+
+def test_success_clears_failure(store):
+    store.mark_failed([("제주", "google", "맛집")])
+    store.mark_fetched([("제주", "google", "맛집", 3)])
+    last, retry_after = store.fetch_times("제주")[("google", "맛집")]
+    assert last is not None and retry_after is None
+
+def test_needs_refresh_skips_failed_tasks_until_retry(store):
+    plan = logic.plan_refresh("제주", ["맛집"])
+    assert logic.needs_refresh("제주", ["맛집"])
+    store.mark_failed([("제주", "google", t['keyword']) for t in plan['tasks'] if t['source'] == "google"])
+    assert not logic.needs_refresh("제주", ["맛집"])
+    assert all(t['backoff'] for t in logic.plan_refresh("제주", ["맛집"], ttl=backend.FETCH_TTL)['tasks'] if t['source'] == "google")
+
+def test_fresh_tasks_are_skipped_until_ttl(store):
+    tasks = [t for t in logic.plan_refresh("제주", ["맛집"])['tasks'] if t['source'] == "google"]
+    store.mark_fetched([("제주", "google", t['keyword'], 1) for t in tasks])
+    assert not logic.needs_refresh("제주", ["맛집"])
+    assert logic.needs_refresh("제주", ["맛집"], ttl=0.000001)
+
+def test_tourapi_keyword_is_city_id(store):
+    keywords = {t['keyword'] for city in ("제주", "제주도")
+                for t in logic.plan_refresh(city, ["관광"])['tasks'] if t['source'] == "tourapi"}
+    assert keywords == {"jeju"}
+
+def test_overseas_dry_run_never_geocodes(store, monkeypatch):
+    def geocode(*args, **kwargs): raise AssertionError("외부 API 호출")
+    monkeypatch.setattr(backend, "MY_GOOGLE_KEY", "key")
+    monkeypatch.setattr(backend, "get_gmaps", geocode)
+    plan = logic.update_db("파리", ["관광"], dry_run=True)
+    assert plan['center'] == (0, 0)
+    assert [t for t in plan['tasks'] if t['source'] == "amadeus"]
+    assert logic.needs_refresh("파리", ["관광"])
+
+def test_amadeus_without_center_backs_off(store, monkeypatch):
+    monkeypatch.setattr(backend, "provider_enabled", lambda source: source == "amadeus")
+    monkeypatch.setattr(backend, "get_city_center", lambda city, geocode=True: (0, 0))
+    logic.update_db("파리", ["관광"])
+    assert not logic.needs_refresh("파리", ["관광"])
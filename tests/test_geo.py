@@ -0,0 +1,29 @@
+# geo.DistanceEngine: 거리 행렬 크기 제한 / 저장할 때 행렬 빼기
+import pickle
+import random
+
+import pytest
+
+import geo
+
+def _places(n, seed=1):
+    rnd = random.Random(seed)
+    return [{"lat": 33.2 + rnd.random() * 0.4, "lng": 126.2 + rnd.random() * 0.7} for _ in range(n)]
+
+def test_large_pool_has_no_matrix():
+    assert geo.DistanceEngine(_places(geo.PAIRWISE_MAX)).matrix is not None
+    assert geo.DistanceEngine(_places(geo.PAIRWISE_MAX + 1)).matrix is None
+
+def test_pickle_drops_matrix_and_rebuilds_it():
+    engine = geo.DistanceEngine(_places(200))
+    data = pickle.dumps(engine)
+    assert len(data) < engine.matrix.nbytes
+    loaded = pickle.loads(data)
+    assert loaded.matrix is not None
+    assert loaded.distance(3, 150) == pytest.approx(engine.distance(3, 150))
+
+def test_matrix_and_direct_distances_agree():
+    places = _places(50)
+    with_matrix, direct = geo.DistanceEngine(places), geo.DistanceEngine(places, pairwise_max=0)
+    for i, j in [(0, 1), (7, 42), (49, 3)]:
+        assert with_matrix.distance(i, j) == pytest.approx(direct.distance(i, j), rel=1e-5)
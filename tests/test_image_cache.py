@@ -0,0 +1,88 @@
+# image_cache: 이미지 주소 판별 / 실패 기록 유지 / 응답 닫기 / 용량 정리
+import pytest
+
+import image_cache
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(image_cache, "IMAGE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(image_cache, "_local", type(image_cache._local)())
+    monkeypatch.setattr(image_cache, "_resolvers", {"gphoto:": lambda ref: "https://cdn.example.com/" + ref[7:]})
+
+class FakeRaw:
+    def read(self, size, decode_content=False): return b"image-bytes"
+
+class FakeResponse:
+    def __init__(self, content_type):
+        self.headers = {"Content-Type": content_type}
+        self.raw = FakeRaw()
+        self.closed = False
+
+    def raise_for_status(self): pass
+    def __enter__(self): return self
+    def __exit__(self, *exc): self.closed = True
+
+class FakeSession:
+    def __init__(self, content_type):
+        self.calls, self.urls, self.responses, self.content_type = 0, [], [], content_type
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        self.urls.append(url)
+        self.responses.append(FakeResponse(self.content_type))
+        return self.responses[-1]
+
+@pytest.mark.parametrize("url, expected", [
+    ("https://tong.visitkorea.or.kr/cms/resource/1.jpg", True),
+    ("imgcache:google_photo:abc", True),
+    ("gphoto:places/abc/photos/xyz", True),
+    ("http://place.map.kakao.com/15264554", False),
+    ("https://source.unsplash.com/400x300/?travel", False),
+    ("", False),
+    (None, False),
+])
+def test_is_image_url(url, expected):
+    assert image_cache.is_image_url(url) is expected
+
+def test_non_image_url_is_never_requested(monkeypatch):
+    session = FakeSession("text/html")
+    monkeypatch.setattr(image_cache, "_get_session", lambda: session)
+    assert image_cache.prefetch(["http://place.map.kakao.com/1", ""]) == {}
+    assert session.calls == 0
+
+def test_failure_is_persisted_and_response_closed(monkeypatch):
+    session = FakeSession("text/html")
+    monkeypatch.setattr(image_cache, "_get_session", lambda: session)
+    url = "https://example.com/not-an-image"
+    assert image_cache.display_uri(url) is None
+    assert session.calls == 1 and session.responses[0].closed
+
+    # 새 프로세스처럼 커넥션을 새로 열어도 실패 기록이 남아 있어 다시 요청하지 않음
+    monkeypatch.setattr(image_cache, "_local", type(image_cache._local)())
+    assert image_cache.display_uri(url) is None
+    assert session.calls == 1
+
+def test_reference_is_resolved_once_on_first_display(monkeypatch):
+    monkeypatch.setitem(image_cache.IMAGE_SIZES, "large", (400, None))
+    session = FakeSession("image/jpeg")
+    monkeypatch.setattr(image_cache, "_get_session", lambda: session)
+    monkeypatch.setattr(image_cache, "_get_pil", lambda: False)
+    ref = "gphoto:places/abc/photos/xyz"
+    first = image_cache.display_uri(ref)
+    assert first and first.startswith("data:image/jpeg;base64,")
+    assert session.urls == ["https://cdn.example.com/places/abc/photos/xyz"]
+    assert image_cache.display_uri(ref, "large") and session.calls == 1  # 다른 크기도 원본 캐시에서
+
+def test_eviction_keeps_running_total(monkeypatch):
+    monkeypatch.setattr(image_cache, "IMAGE_CACHE_MAX_BYTES", 25)
+    stored_bytes = image_cache._stored_bytes
+    sums = []
+    monkeypatch.setattr(image_cache, "_stored_bytes", lambda conn: sums.append(1) or stored_bytes(conn))
+    image_cache.put("img0", b"0" * 10)
+    image_cache.put("img1", b"1" * 10)
+    image_cache.put("same", b"1" * 10)        # 같은 파일은 용량에 다시 더하지 않음
+    assert len(sums) == 1                     # 처음 한 번만 인덱스를 셈
+    image_cache.put("img2", b"2" * 10)        # 넘치면 오래 안 쓴 것부터 정리한 뒤 다시 셈
+    assert len(sums) == 2
+    assert image_cache.get("img0") is None
+    assert all(image_cache.get(k) for k in ("img1", "same", "img2"))
@@ -0,0 +1,42 @@
+# place_dedupe: 비슷한 장소 합치기 / 체인 지점 오탐 방지 / 격자 블로킹
+import math
+import random
+
+import pytest
+
+import place_dedupe
+
+def _place(pid, name, lat=33.4580, lng=126.9425, rating=4.0):
+    return {"id": pid, "name": name, "lat": lat, "lng": lng, "rating": rating}
+
+def test_request_example_is_merged_into_first_record():
+    places = [_place("google_1", "성산일출봉", rating=4.6),
+              _place("kakao_1", "성산 일출봉 (UNESCO)", lat=33.4583, lng=126.9428)]
+    assert [p['id'] for p in place_dedupe.merge_near_duplicates(places)] == ["google_1"]
+
+@pytest.mark.parametrize("a, b", [
+    ("스타벅스 강남점", "스타벅스 강남역점"),
+    ("CU 제주공항점", "CU 제주공항2호점"),
+    ("성산일출봉", "성산일출봉주차장"),
+])
+def test_different_places_with_similar_names_are_kept(a, b):
+    assert not place_dedupe.name_similar(a, b)
+    places = [_place("a", a), _place("b", b, lat=33.4581)]
+    assert len(place_dedupe.merge_near_duplicates(places)) == 2
+
+def test_same_branch_written_differently_is_merged():
+    assert place_dedupe.name_similar("스타벅스 강남점", "스타벅스강남점 (리저브)")
+
+def test_same_name_far_apart_is_kept():
+    places = [_place("a", "성산일출봉"), _place("b", "성산일출봉", lat=33.4580 + 0.01)]  # 약 1.1km
+    assert len(place_dedupe.merge_near_duplicates(places)) == 2
+
+def test_nearby_cells_cover_match_radius():
+    rng = random.Random(0)
+    for _ in range(2000):
+        lat, lng = rng.uniform(-70, 70), rng.uniform(-179, 179)
+        bearing, dist = rng.uniform(0, 6.283), rng.uniform(0, place_dedupe.MAX_DUP_DISTANCE_KM * 0.999)
+        lat2 = lat + dist / place_dedupe.KM_PER_DEG * math.cos(bearing)
+        lng2 = lng + dist / (place_dedupe.KM_PER_DEG * math.cos(math.radians(lat))) * math.sin(bearing)
+        if place_dedupe._distance_km(lat, lng, lat2, lng2) > place_dedupe.MAX_DUP_DISTANCE_KM: continue
+        assert place_dedupe.grid_cell(lat2, lng2) in place_dedupe.nearby_cells(lat, lng)
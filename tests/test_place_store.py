@@ -0,0 +1,107 @@
+# SQLitePlaceStore: 도시별 데이터 버전 / 조회 / 첫 사용 시 초기화
+import json
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import backend
+
+def _place(pid, city="제주", rating=4.0, **extra):
+    return dict({"id": pid, "source": "google", "name": f"장소{pid}", "city": city, "category": "관광지",
+                 "lat": 33.45, "lng": 126.56, "address": city, "rating": rating, "img_url": "", "desc": ""}, **extra)
+
+def _store(tmp_path):
+    store = backend.SQLitePlaceStore(str(tmp_path / "places.db"))
+    store.init()
+    return store
+
+def test_version_changes_only_when_city_changes(tmp_path):
+    store = _store(tmp_path)
+    assert store.version("제주") == "0:"
+    store.upsert_many([_place("1"), _place("2", city="부산")])
+    jeju, busan = store.version("제주도"), store.version("부산")
+    assert jeju != "0:"
+
+    store.upsert_many([_place("1")])                 # 값이 같으면 버전 그대로
+    assert store.version("제주") == jeju
+    store.upsert_many([_place("1", rating=4.8)])     # 수정된 도시만 버전이 바뀜
+    assert store.version("제주") != jeju and store.version("부산") == busan
+
+def test_overlapping_results_stay_in_first_city(tmp_path):
+    # 같은 구글 장소가 제주 검색과 서귀포 검색에 모두 나오는 경우
+    store = _store(tmp_path)
+    store.upsert_many([_place("google_a"), _place("google_b")])
+    jeju = store.version("제주")
+    stats = store.upsert_many([_place("google_b", city="서귀포", rating=4.7), _place("google_c", city="서귀포")])
+    assert stats['inserted'] == 1 and stats['updated'] == 1
+    assert sorted(p['id'] for p in store.query("제주")) == ["google_a", "google_b"]
+    assert [p['id'] for p in store.query("서귀포")] == ["google_c"]
+    assert store.query("제주")[0]['rating'] == 4.7   # 값은 새로 받은 것으로 수정
+    assert store.version("제주") != jeju
+
+def test_city_alone_is_not_a_change(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_many([_place("1")])
+    seogwipo = store.version("서귀포")
+    assert store.upsert_many([_place("1", city="서귀포", address="제주")])['unchanged'] == 1
+    assert store.version("서귀포") == seogwipo
+
+def test_query_reloads_after_upsert(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_many([_place("1", rating=4.0)])
+    assert [p['id'] for p in store.query("제주")] == ["1"]
+    store.upsert_many([_place("2", rating=4.5)])
+    assert [p['id'] for p in store.query("제주")] == ["2", "1"]
+
+def test_versions_seeded_for_existing_database(tmp_path):
+    store = _store(tmp_path)
+    store.upsert_many([_place("1")])
+    conn = store._conn()
+    with conn: conn.execute("DELETE FROM city_versions")  # 버전 표가 없던 예전 DB 파일
+    reopened = _store(tmp_path)
+    assert reopened.version("제주") != "0:"
+
+def test_concurrent_first_use_waits_for_schema(tmp_path, monkeypatch):
+    store = backend.SQLitePlaceStore(str(tmp_path / "places.db"))
+    migrate = store._migrate
+
+    def slow_migrate(conn):
+        time.sleep(0.2)  # 다른 스레드가 그 사이에 조회하도록
+        migrate(conn)
+
+    monkeypatch.setattr(store, "_migrate", slow_migrate)
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: store.version("제주"), range(4)))
+    assert results == ["0:"] * 4
+
+def test_failed_init_is_retried(tmp_path, monkeypatch):
+    store = backend.SQLitePlaceStore(str(tmp_path / "places.db"))
+    migrate = store._migrate
+
+    def broken_migrate(conn):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(store, "_migrate", broken_migrate)
+    with pytest.raises(sqlite3.OperationalError): store.init()
+    monkeypatch.setattr(store, "_migrate", migrate)
+    assert store.version("제주") == "0:"
+
+def test_legacy_google_photo_urls_are_cleared(tmp_path):
+    store = _store(tmp_path)
+    legacy = "https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference=abc&key=SECRET"
+    store.upsert_many([_place("1", img_url=legacy), _place("2", img_url="https://tong.visitkorea.or.kr/1.jpg")])
+    before = store.version("제주")
+    reopened = _store(tmp_path)
+    assert {p['id']: p['img_url'] for p in reopened.query("제주")} == {"1": "", "2": "https://tong.visitkorea.or.kr/1.jpg"}
+    assert reopened.version("제주") != before
+
+def test_get_places_returns_plain_list(tmp_path, monkeypatch):
+    store = _store(tmp_path)
+    store.upsert_many([_place("1"), _place("2", rating=4.5)])
+    monkeypatch.setattr(backend, "get_store", lambda: store)
+    places = backend.get_places("제주")
+    assert isinstance(places, list) and [p['id'] for p in places] == ["2", "1"]
+    assert json.loads(json.dumps(places + []))[0]['name'] == "장소2"
+    assert hasattr(backend.get_place_view("제주", limit=None), "column")  # 내부 계산용은 열 배열 뷰
@@ -0,0 +1,62 @@
+# 일정 결과 캐시: 요청 지문(도시, 스타일, 일수, 데이터 버전, seed) / 세션 공용 LRU
+from collections import OrderedDict
+
+import pytest
+
+import backend
+import travel_logic as logic
+from test_travel_logic import _pool
+
+@pytest.fixture
+def version(monkeypatch):
+    """도시 데이터 버전 (값을 바꾸면 새 데이터가 들어온 것)"""
+    version = {"value": "1:0"}
+    monkeypatch.setattr(backend, "get_data_version", lambda city: version['value'])
+    return version
+
+@pytest.fixture
+def calls(version, monkeypatch):
+    """generate_plans를 실행한 seed 목록 (가짜 후보군 사용, 저장소 / DB 없이)"""
+    pool, calls = _pool(), []
+    monkeypatch.setattr(logic, "prepare_pool", lambda city, styles: pool)
+    monkeypatch.setattr(logic, "_plan_cache", OrderedDict())
+    monkeypatch.setattr(logic.plan_store, "load_plans", lambda *args: None)
+    generate = logic.generate_plans
+    monkeypatch.setattr(logic, "generate_plans", lambda *args, **kwargs: calls.append(kwargs['seed']) or generate(*args, **kwargs))
+    return calls
+
+def test_fingerprint_uses_city_id_and_style_set():
+    key = logic.plan_fingerprint("제주", ["맛집", "힐링"], 3, "1:0", 7)
+    assert logic.plan_fingerprint("제주도", ["힐링", "맛집"], 3, "1:0", 7) == key
+    for other in [("부산", ["맛집", "힐링"], 3, "1:0", 7), ("제주", ["맛집"], 3, "1:0", 7),
+                  ("제주", ["맛집", "힐링"], 4, "1:0", 7), ("제주", ["맛집", "힐링"], 3, "2:0", 7),
+                  ("제주", ["맛집", "힐링"], 3, "1:0", 8)]:
+        assert logic.plan_fingerprint(*other) != key
+
+def test_same_seed_gives_same_plans(calls):
+    data = {"dest_city": "제주", "style": ["맛집"]}
+    assert logic.generate_plans(data, 3, seed=4) == logic.generate_plans(data, 3, seed=4)
+    assert logic.generate_plans(data, 3, seed=4) != logic.generate_plans(data, 3, seed=5)
+
+def test_identical_requests_are_served_from_memo(calls):
+    first = logic.get_plans({"dest_city": "제주", "style": ["맛집", "힐링"]}, 3, seed=1)
+    again = logic.get_plans({"dest_city": "제주도", "style": ["힐링", "맛집"]}, 3, seed=1)
+    assert calls == [1]
+    assert [p['days'] for p in again] == [p['days'] for p in first]
+    assert "제주도" in again[0]['theme'] and again[0]['seed'] == 1   # 이름은 요청한 도시로
+
+def test_new_seed_or_data_version_regenerates(calls, version):
+    data = {"dest_city": "제주", "style": ["맛집"]}
+    logic.get_plans(data, 3, seed=1)
+    logic.get_plans(data, 3, seed=2)           # '다시 추천'
+    version['value'] = "2:0"                  # 새 데이터가 들어옴
+    logic.get_plans(data, 3, seed=1)
+    assert calls == [1, 2, 1]
+
+def test_returned_plans_do_not_share_cache(calls):
+    data = {"dest_city": "제주", "style": ["맛집"]}
+    plans = logic.get_plans(data, 3, seed=1)
+    plans[0]['theme'] = "바뀜"
+    plans.pop()
+    again = logic.get_plans(data, 3, seed=1)
+    assert again[0]['theme'] != "바뀜" and len(again) == len(logic.THEMES)
@@ -0,0 +1,75 @@
+# travel_logic: 장소 카드 / 일정 생성
+import random
+
+import pytest
+
+import geo
+import travel_logic as logic
+
+def _row(img_url, name="성산일출봉"):
+    return {"name": name, "category": "관광지", "address": "제주", "lat": 33.45, "lng": 126.94, "img_url": img_url}
+
+def test_card_link_never_carries_api_key():
+    legacy = "https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference=abc&key=SECRET"
+    for img_url in (legacy, "gphoto:places/abc/photos/xyz", "imgcache:google_photo:abc"):
+        place = logic.make_place("10:00", "관광", _row(img_url))
+        assert "key=" not in place['url'] and place['url'].startswith("https://www.google.com/maps/search/")
+
+def test_kakao_place_page_is_link_not_image():
+    place = logic.make_place("10:00", "관광", _row("http://place.map.kakao.com/123"))
+    assert place['url'] == "http://place.map.kakao.com/123" and place['img'] == ""
+
+def _pool(n=400, seed=3):
+    rnd = random.Random(seed)
+    kinds = [("sight", "food", "hotel")[i % 3] for i in range(n)]
+    places = [{"name": f"장소{i}", "category": kinds[i], "address": "제주", "lat": 33.2 + rnd.random() * 0.4,
+               "lng": 126.2 + rnd.random() * 0.7, "img_url": "", "score": 80} for i in range(n)]
+    top = min(n, logic.TOP_TIER_SIZE)
+    return {"version": "t", "places": places, "kinds": kinds, "top_count": top, "engine": geo.DistanceEngine(places),
+            "rest": {k: [i for i in range(top, n) if kinds[i] == k] for k in ("sight", "food", "hotel")}}
+
+@pytest.fixture
+def fake_pool(monkeypatch):
+    pool = _pool()
+    monkeypatch.setattr(logic, "prepare_pool", lambda city, styles: pool)
+    return pool
+
+def test_threaded_themes_match_sequential(fake_pool, monkeypatch):
+    data = {"dest_city": "제주", "style": ["맛집"]}
+    themes = logic.THEMES * 2
+    monkeypatch.setattr(logic, "THEME_WORKERS", 1)
+    sequential = logic.generate_plans(data, 3, seed=5, themes=themes)
+    monkeypatch.setattr(logic, "THEME_WORKERS", 4)
+    assert logic.generate_plans(data, 3, seed=5, themes=themes) == sequential
+
+def test_themes_with_same_mix_ratio_differ(fake_pool):
+    themes = logic.THEMES + [dict(logic.THEMES[0], name="추가")]
+    plans = logic.generate_plans({"dest_city": "제주", "style": ["맛집"]}, 3, seed=1, themes=themes)
+    assert plans[0]['days'] != plans[-1]['days']
+
+# --- 동선 개선 (2-opt / or-opt) ---
+def _day_routes(pool, days=3, seed=0):
+    buckets = tuple([i for i in range(len(pool['kinds'])) if pool['kinds'][i] == k] for k in ("sight", "food", "hotel"))
+    routes, _ = logic.build_theme_routes(logic.THEMES[0], 0, pool['engine'], buckets, days, seed)
+    return routes
+
+def test_improve_routes_keeps_slot_kinds_and_times():
+    pool = _pool()
+    routes = _day_routes(pool)
+    before = [[(t, name, kind) for t, name, kind, _ in day] for day in routes]
+    before_places = [sorted(i for *_, i in day) for day in routes]
+    km = logic.improve_routes(pool['engine'], routes)
+    assert [[(t, name, kind) for t, name, kind, _ in day] for day in routes] == before
+    assert all(pool['kinds'][i] == kind for day in routes for _, _, kind, i in day)
+    assert [sorted(i for *_, i in day) for day in routes] == before_places  # 같은 날 안에서 순서만 바뀜
+    assert km['after'] <= km['before']
+
+def test_improve_routes_is_deterministic_and_capped():
+    pool = _pool()
+    first, second, untouched = _day_routes(pool), _day_routes(pool), _day_routes(pool)
+    logic.improve_routes(pool['engine'], first)
+    logic.improve_routes(pool['engine'], second)
+    assert first == second
+    original = [list(day) for day in untouched]
+    logic.improve_routes(pool['engine'], untouched, max_moves=0)
+    assert untouched == original
@@ -0,0 +1,66 @@
+# 이동 시간 캐시: 빠진 쌍만 조회 / 캐시 일괄 조회 / 구글 요청 제한 통과
+import pytest
+
+import backend
+
+class FakeGmaps:
+    def __init__(self):
+        self.requests = []
+
+    def distance_matrix(self, origins, destinations, mode):
+        self.requests.append((list(origins), list(destinations)))
+        return {"rows": [{"elements": [{"status": "OK", "duration": {"value": 60 * (i + 1) + j}}
+                                       for j, _ in enumerate(destinations)]} for i, _ in enumerate(origins)]}
+
+class CountingGate:
+    def __init__(self):
+        self.turns, self.held = 0, False
+        self.semaphore = self
+
+    def __enter__(self): self.held = True
+    def __exit__(self, *exc): self.held = False
+
+    def wait_turn(self):
+        assert self.held   # 동시성 제한 안에서 차례를 기다림
+        self.turns += 1
+
+@pytest.fixture
+def gmaps(tmp_path, monkeypatch):
+    client = FakeGmaps()
+    monkeypatch.setattr(backend, "_travel_cache", backend.TravelTimeCache(str(tmp_path / "travel.db")))
+    monkeypatch.setattr(backend, "get_gmaps", lambda: client)
+    monkeypatch.setattr(backend, "provider_enabled", lambda source: True)
+    return client
+
+A, B, C = (33.1, 126.1), (33.2, 126.2), (33.3, 126.3)
+
+def test_second_call_is_served_from_cache(gmaps):
+    first = backend.get_travel_times([A, B], [B, C])
+    sent = len(gmaps.requests)
+    assert backend.get_travel_times([A, B], [B, C]) == first
+    assert len(gmaps.requests) == sent
+    assert first[1][0] == 0   # 같은 지점
+
+def test_only_missing_pairs_are_requested(gmaps):
+    backend.get_travel_times([A], [B])
+    backend.get_travel_times([A, C], [B, C])
+    # A->B 는 캐시에 있으므로 A->C, C->B 만 조회 (A,C x B,C 전체를 다시 요청하지 않음)
+    requested = {(o, d) for origins, dests in gmaps.requests[1:] for o in origins for d in dests}
+    assert requested == {(A, C), (C, B)}
+
+def test_same_destinations_are_batched(gmaps):
+    backend.get_travel_times([A, B], [C])
+    assert gmaps.requests == [([A, B], [C])]
+
+def test_requests_go_through_provider_gate(gmaps, monkeypatch):
+    gate = CountingGate()
+    monkeypatch.setitem(backend._gates, "google", gate)
+    backend.get_travel_times([A], [B, C])
+    assert gate.turns == len(gmaps.requests) == 1
+
+def test_cache_lookup_is_chunked(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, "TRAVEL_CACHE_CHUNK", 3)
+    cache = backend.TravelTimeCache(str(tmp_path / "travel.db"))
+    values = {((33.0, 126.0 + i / 100), (34.0, 127.0)): i for i in range(10)}
+    cache.put_many("google", "driving", values)
+    assert cache.get_many("google", "driving", list(values) + [(A, B)]) == values
@@ -3,7 +3,13 @@ import sys
 import os
 import math
 import random
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date, timedelta
+import time
+
+import numpy as np
 
 # [경로 설정] backend.py 위치 찾기 (상위 폴더)
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -11,9 +17,18 @@ parent_dir = os.path.dirname(current_dir)
 sys.path.append(parent_dir)
 
 import backend  # DB 통신 모듈
+import geo  # 거리 계산 엔진 (NumPy)
+import place_classifier  # 스타일 / 카테고리 분류기
+import place_dedupe  # 비슷한 장소 합치기
+import image_cache  # 로컬 이미지 캐시
+import diagnostics  # 단계별 시간 계측
+import cities  # 도시 이름 -> 표준 도시 ID
+import plan_store  # 미리 계산한 후보군 / 일정 (python -m precompute)
 
 # --- [기능 1] 국내/해외 판별 ---
 def check_is_domestic(city_name):
+    known = cities.is_domestic(city_name)  # 정규화 표에 있는 도시는 표 기준
+    if known is not None: return known
     korean_cities = [
         "서울", "부산", "제주", "인천", "대구", "대전", "광주", "울산", "수원", "강릉", 
         "경주", "전주", "여수", "속초", "춘천", "가평", "양평", "포항", "거제", "남해", 
@@ -40,30 +55,15 @@ def haversine_distance(lat1, lon1, lat2, lon2):
 
 # --- [기능 3] 점수 계산 알고리즘 ---
 def calculate_score(place, user_styles):
-    style_keywords = {
-        "휴양": ["beach", "park", "nature", "resort", "해변", "공원", "휴양", "산책"],
-        "힐링": ["forest", "garden", "spa", "relax", "숲", "정원", "온천", "힐링"],
-        "관광": ["tourist", "museum", "landmark", "sight", "관광", "박물관", "명소", "유적"],
-        "맛집": ["food", "restaurant", "meal", "dish", "식당", "음식", "요리", "맛집"],
-        "쇼핑": ["shopping", "mall", "market", "store", "쇼핑", "시장", "몰", "백화점"],
-        "자연": ["nature", "mountain", "lake", "hiking", "자연", "산", "호수", "등산"]
-    }
-    
     try: rating = float(place.get('rating', 0))
     except: rating = 3.0
         
     base_score = rating * 10
     if base_score == 0: base_score = 30
     
-    bonus_score = 0
-    place_cat = str(place['category']).lower() + " " + str(place['name']).lower()
-    
-    matched_tags = []
-    for style in user_styles:
-        keywords = style_keywords.get(style, [style])
-        if any(k in place_cat for k in keywords):
-            bonus_score += 20
-            matched_tags.append(style)
+    # 스타일 태그는 수집 시점에 미리 분류해 둔 값(style_tags)을 사용
+    matched_tags = place_classifier.matched_styles(place, user_styles)
+    bonus_score = 20 * len(matched_tags)
             
     final_score = base_score + bonus_score
     return final_score, matched_tags
@@ -74,9 +74,14 @@ def get_booking_url(place_name):
     return f"{base_url}{place_name} 예약"
 
 # --- [기능 5] 장소 객체 포맷팅 ---
-def make_place(time, type_name, db_row):
-    img = db_row.get('img_url')
-    if not img: img = "https://source.unsplash.com/400x300/?travel"
+def make_place(slot_time, type_name, db_row):
+    # 이미지는 주소(또는 로컬 캐시 참조)만 넘기고, 화면에서 image_cache.prefetch로 한 번에 줄여서 씁니다.
+    # 카카오는 img_url에 장소 상세 페이지가 들어 있으므로 이미지 주소가 아니면 비워 둠 (화면에서 빈 칸 표시)
+    url = db_row['img_url']
+    img = url if image_cache.is_image_url(url) else ""
+    # 링크는 브라우저로 그대로 가므로 참조나 API 키가 든 주소(예전 구글 사진 주소 등)는 지도 검색 링크로 바꿈
+    if image_cache.is_reference(url) or "key=" in str(url):
+        url = f"https://www.google.com/maps/search/?api=1&query={db_row['name']}"
     
     # 태그 HTML 생성은 UI 영역이지만, 데이터 구조 안에 포함되어 있어 여기서 처리
     tags_html = ""
@@ -87,132 +92,422 @@ def make_place(time, type_name, db_row):
     except: raw_score = 80
 
     return {
-        "time": time, "type": type_name, "name": db_row['name'],
+        "time": slot_time, "type": type_name, "name": db_row['name'],
         "desc": f"{db_row['category']} | {db_row['address']} {tags_html}",
-        "lat": db_row['lat'], "lng": db_row['lng'], "url": db_row['img_url'],
+        "lat": db_row['lat'], "lng": db_row['lng'], "url": url,
         "raw_score": raw_score, "img": img
     }
 
+# --- [기능 7] 동선 개선 (2-opt / or-opt) ---
+# 하루 동선에 적용할 최대 개선 횟수. 시간 제한 대신 횟수 제한이라 같은 입력이면 기기 부하와 상관없이 항상 같은 동선
+# (하루 5곳 기준 보통 수십 번 평가 안에 더 줄일 수 없는 상태가 되므로 거의 닿지 않는 안전장치)
+ROUTE_MAX_MOVES = 50
+
+def route_km(engine, seq):
+    """순서대로 이동한 총 거리(km) (좌표 없는 구간은 제외)"""
+    legs = [engine.distance(a, b) for a, b in zip(seq, seq[1:])]
+    return sum(d for d in legs if d < geo.NO_DISTANCE)
+
+def _route_cost(engine, seq):
+    return sum(engine.distance(a, b) for a, b in zip(seq, seq[1:]))
+
+def _improve_day(engine, seq, kinds, max_moves=ROUTE_MAX_MOVES):
+    """
+    시간대별 종류(식사/관광/숙소) 배치는 그대로 두고 방문 순서만 바꿔 거리를 줄입니다.
+    kinds: 장소 인덱스 -> 종류, 슬롯 순서의 종류 패턴과 같을 때만 이동 허용
+    """
+    pattern = [kinds[i] for i in seq]
+    best = _route_cost(engine, seq)
+
+    def candidates():
+        n = len(seq)
+        # 2-opt: 구간 뒤집기
+        for i in range(n - 1):
+            for j in range(i + 1, n):
+                yield seq[:i] + seq[i:j + 1][::-1] + seq[j + 1:]
+        # or-opt: 1~2개짜리 구간을 다른 위치로 옮기기
+        for seg_len in (1, 2):
+            for i in range(n - seg_len + 1):
+                seg, rest = seq[i:i + seg_len], seq[:i] + seq[i + seg_len:]
+                for k in range(len(rest) + 1):
+                    if k != i: yield rest[:k] + seg + rest[k:]
+
+    for _ in range(max_moves):
+        for cand in candidates():
+            if [kinds[i] for i in cand] != pattern: continue
+            cost = _route_cost(engine, cand)
+            if cost < best - 1e-9:
+                seq, best = cand, cost
+                break
+        else:
+            break  # 더 줄일 수 있는 이동이 없음
+    return seq
+
+def improve_routes(engine, day_routes, max_moves=ROUTE_MAX_MOVES):
+    """일차별 동선을 제자리에서 개선하고 총 이동거리(km) 전/후를 반환"""
+    before = after = 0.0
+    for slots in day_routes:
+        seq = [s[3] for s in slots]
+        kinds = {s[3]: s[2] for s in slots}
+        before += route_km(engine, seq)
+        if len(seq) > 2:
+            seq = _improve_day(engine, seq, kinds, max_moves)
+            # 시간/이름은 슬롯 자리에 그대로 두고 장소만 바꿔 끼움
+            slots[:] = [(t, name, p_type, i) for (t, name, p_type, _), i in zip(slots, seq)]
+        after += route_km(engine, seq)
+    return {"before": round(before, 1), "after": round(after, 1)}
+
 # --- [핵심 기능] 일정 생성 알고리즘 ---
-def generate_plans(data, duration):
-    city = data['dest_city']
-    user_styles = data['style']
+# 테마별 스케줄 템플릿 (시간, 이름, 종류)
+SCHEDULE_TEMPLATES = {
+    "food_heavy": [
+        ("11:00", "아점", "food"), ("13:00", "산책", "sight"),
+        ("15:00", "카페", "food"), ("18:00", "저녁", "food"), ("21:00", "숙소", "hotel")
+    ],
+    "relaxed": [
+        ("10:30", "오전 여유", "sight"), ("13:00", "점심", "food"),
+        ("15:30", "오후 관광", "sight"), ("19:00", "저녁", "food"), ("21:00", "숙소", "hotel")
+    ],
+    "default": [
+        ("10:00", "오전 관광", "sight"), ("12:30", "점심", "food"),
+        ("15:00", "오후 관광", "sight"), ("18:30", "저녁", "food"), ("21:00", "숙소", "hotel")
+    ],
+}
+
+# 테마 목록 (이름의 {city}는 도시 이름으로 바뀜). 테마를 늘리려면 여기에 추가하세요.
+THEMES = [
+    {"name": "✨ {city} 맞춤 추천", "desc": "밸런스 최적 코스", "mix_ratio": "balanced"},
+    {"name": "🍽️ 식도락 여행", "desc": "맛집 위주 탐방", "mix_ratio": "food_heavy"},
+    {"name": "🔥 핫플레이스", "desc": "인기 명소 위주", "mix_ratio": "sight_heavy"},
+    {"name": "🌿 힐링 & 휴식", "desc": "여유로운 일정", "mix_ratio": "relaxed"}
+]
+
+def build_theme_routes(theme, theme_index, engine, buckets, duration, seed, optimize_routes=False):
+    """
+    테마 1개의 일차별 동선 생성 (장소 데이터 대신 좌표 배열(engine)과 인덱스만 사용)
+    buckets: (관광지 인덱스, 음식점 인덱스, 숙소 인덱스)
+    seed: 같은 seed면 같은 일정이 나옵니다. RNG는 (seed, 테마 순번)으로 만들어서
+          mix_ratio가 같은 테마를 추가해도 서로 다른 일정이 나옵니다.
+    반환값: (일차별 [(시간, 이름, 종류, 장소 인덱스), ...], 이동거리 전/후)
+    """
+    rng = random.Random(f"{seed}:{theme_index}")
+    all_sights, all_foods, all_hotels = buckets
+
+    pool_sights = all_sights[:] 
+    pool_foods = all_foods[:]
+    pool_hotels = all_hotels[:]
     
-    places = backend.get_places(city)
-    if not places: return []
+    rng.shuffle(pool_sights)
+    rng.shuffle(pool_foods)
+
+    # 아직 일정에 들어가지 않은 후보 (후보가 많으면 격자 인덱스로 최근접 탐색)
+    pools = {"sight": geo.make_pool(engine, pool_sights),
+             "food": geo.make_pool(engine, pool_foods),
+             "hotel": geo.make_pool(engine, pool_hotels)}
+    
+    schedule_template = SCHEDULE_TEMPLATES.get(theme['mix_ratio'], SCHEDULE_TEMPLATES['default'])
+
+    day_routes = []
+    for d in range(1, duration + 1):
+        day_slots = []
+        last_place = None 
+        
+        for slot_time, type_name, p_type in schedule_template:
+            candidates = pools[p_type]
+            if not candidates: continue 
+            
+            if last_place is None:
+                # 하루의 시작은 셔플된 순서상 첫 번째 남은 후보
+                selected = candidates.first()
+            else:
+                # 가장 가까운 후보 (Greedy, 전체 정렬 없이 최근접 탐색)
+                selected = candidates.nearest(last_place)
+            
+            candidates.remove(selected)
+            day_slots.append((slot_time, type_name, p_type, selected))
+            last_place = selected 
+        
+        day_routes.append(day_slots)
+
+    # (선택) 2-opt / or-opt로 하루 동선 다듬기
+    distance_km = improve_routes(engine, day_routes) if optimize_routes else None
+    return day_routes, distance_km
+
+# 테마별 동선은 스레드 풀에서 동시에 계산합니다. 후보군과 거리 엔진(NumPy 배열)은 읽기만 하므로 복사 없이 공유하고,
+# 테마마다 RNG / 후보 풀을 따로 만들어서 스레드끼리 건드리는 상태가 없습니다.
+# (NumPy 연산 구간만 GIL을 놓으므로 코어가 1개면 순차 실행과 같음 -> 그때는 풀을 쓰지 않음)
+THEME_WORKERS = int(os.environ.get("THEME_WORKERS", min(4, os.cpu_count() or 1)))
+_theme_executor = None
+_theme_lock = threading.Lock()
+
+def _get_theme_executor():
+    global _theme_executor
+    if _theme_executor is None:
+        with _theme_lock:
+            if _theme_executor is None:
+                _theme_executor = ThreadPoolExecutor(max_workers=THEME_WORKERS, thread_name_prefix="theme")
+    return _theme_executor
+
+def _build_all_routes(themes, args):
+    if THEME_WORKERS <= 1 or len(themes) < 2:
+        return [build_theme_routes(theme, i, *args) for i, theme in enumerate(themes)]
+    futures = [_get_theme_executor().submit(build_theme_routes, theme, i, *args) for i, theme in enumerate(themes)]
+    return [f.result() for f in futures]
+
+def _finish_plan(theme, places, day_routes, distance_km, user_styles):
+    days = []
+    for d, day_slots in enumerate(day_routes, 1):
+        day_places = [make_place(slot_time, type_name, places[i]) for slot_time, type_name, _, i in day_slots]
+        days.append({"day": d, "places": day_places})
+        
+    all_scores = [p['raw_score'] for d in days for p in d['places']]
+    avg_score = int(sum(all_scores) / len(all_scores)) if all_scores else 80
+    
+    return {
+        "theme": theme['name'], "desc": theme['desc'], 
+        "score": avg_score, "tags": user_styles, "days": days, "route_km": distance_km
+    }
+
+# --- [기능 8] 도시별 후보군 캐시 (중복 제거 + 점수 + 분류까지 끝난 상태) ---
+# 모듈 전역이라 모든 Streamlit 세션/재실행이 함께 씁니다. "다시 추천"은 셔플과 동선만 새로 계산합니다.
+POOL_CACHE_SIZE = 32     # 최대 보관 개수 (오래 안 쓴 것부터 삭제)
+TOP_TIER_SIZE = 40       # 셔플 대상이 되는 상위 후보 수
+_pool_cache = OrderedDict()
+_pool_lock = threading.Lock()
+
+def _cache_get(key, version):
+    with _pool_lock:
+        entry = _pool_cache.get(key)
+        if entry is None or entry['version'] != version:
+            diagnostics.count(f"cache.{key[0]}_miss")
+            return None
+        _pool_cache.move_to_end(key)
+        diagnostics.count(f"cache.{key[0]}_hit")
+        return entry
+
+def _cache_put(key, entry):
+    with _pool_lock:
+        _pool_cache[key] = entry
+        _pool_cache.move_to_end(key)
+        while len(_pool_cache) > POOL_CACHE_SIZE:
+            _pool_cache.popitem(last=False)
+
+def invalidate_pool_cache(city=None):
+    """city의 캐시를 비움 (None이면 전체)"""
+    cid = None if city is None else cities.city_id(city)
+    with _pool_lock:
+        for key in [k for k in _pool_cache if cid is None or k[1] == cid]:
+            del _pool_cache[key]
 
-    # 1. 데이터 정제 및 중복 제거
-    places.sort(key=lambda x: (x.get('img_url') != "", float(x.get('rating', 0))), reverse=True)
+def dedupe_places(places):
+    """이름이 같거나 비슷한 장소는 하나만 남김 (이미지가 있거나 평점이 높은 데이터 우선)"""
+    if hasattr(places, "column"):
+        # 열 배열 뷰(backend.get_place_view): 정렬 / 이름 비교는 열로 하고 남은 장소만 dict로 꺼냄
+        has_img = places.column('img_url') != ""
+        order = np.lexsort((-places.column('rating'), ~has_img)).tolist()
+        names = places.column('name')
+    else:
+        order = sorted(range(len(places)), key=lambda i: (places[i].get('img_url') != "", float(places[i].get('rating', 0))), reverse=True)
+        names = [p['name'] for p in places]
     unique_places = []
     seen_names = set()
 
-    for p in places:
-        clean_name = ''.join(filter(str.isalnum, p['name'])).lower()
+    for i in order:
+        clean_name = ''.join(filter(str.isalnum, names[i])).lower()
         if clean_name not in seen_names:
             seen_names.add(clean_name)
-            unique_places.append(p)
-    places = unique_places
-
-    # 2. 점수 계산 및 정렬
-    scored_places = []
-    for p in places:
-        score, tags = calculate_score(p, user_styles)
-        p['score'] = score
-        p['matched_tags'] = tags
-        scored_places.append(p)
-    scored_places.sort(key=lambda x: x['score'], reverse=True)
+            unique_places.append(places[i])
+    # 이름이 조금 다르지만 가까이 있는 같은 장소 합치기 (지오해시 블로킹 + trigram 유사도)
+    return place_dedupe.merge_near_duplicates(unique_places)
+
+def _city_places(city, version):
+    key = ("places", cities.city_id(city))
+    entry = _cache_get(key, version)
+    if entry is None:
+        places = backend.get_place_view(city, limit=None)
+        with diagnostics.span("plan.dedupe", rows=len(places)):
+            entry = {"version": version, "places": dedupe_places(places) if places else []}
+        _cache_put(key, entry)
+    return entry['places']
+
+def prepare_pool(city, user_styles):
+    """
+    도시 + 스타일 조합별로 준비된 후보군을 반환합니다. (캐시에 있으면 그대로)
+    places: 점수순 정렬된 장소 (읽기 전용으로 사용), kinds: 장소별 버킷,
+    rest: 상위 그룹 밖 장소의 버킷별 인덱스, engine: 거리 계산 엔진
+    """
+    version = backend.get_data_version(city)
+    cid = cities.city_id(city)
+    key = ("pool", cid, tuple(sorted(user_styles)))
+    entry = _cache_get(key, version)
+    if entry is not None: return entry
+    # 메모리에 없으면 미리 계산해 둔 후보군부터 (데이터 버전이 같을 때만)
+    entry = plan_store.load_pool(cid, user_styles, version)
+    if entry is not None:
+        diagnostics.count("cache.pool_store_hit")
+        _cache_put(key, entry)
+        return entry
+
+    # 2. 점수 계산 및 정렬 (캐시된 장소를 건드리지 않도록 복사본에 기록)
+    city_places = _city_places(city, version)
+    with diagnostics.span("plan.score", rows=len(city_places)):
+        scored_places = []
+        for p in city_places:
+            score, tags = calculate_score(p, user_styles)
+            scored_places.append(dict(p, score=score, matched_tags=tags))
+        scored_places.sort(key=lambda x: x['score'], reverse=True)
+
+    # 4. 카테고리 분류 (수집 시점에 저장된 bucket 사용, 없으면 그때 분류)
+    with diagnostics.span("plan.bucket", rows=len(scored_places)):
+        kinds = [p.get('bucket') or place_classifier.bucket_of(p) for p in scored_places]
+        top_count = min(len(scored_places), TOP_TIER_SIZE)
+        rest = {k: [i for i in range(top_count, len(kinds)) if kinds[i] == k] for k in ("sight", "food", "hotel")}
+
+    # 좌표를 한 번만 배열로 변환해 모든 테마/재추천이 같이 씁니다. (후보가 적으면 전체 거리 행렬까지 미리 계산)
+    with diagnostics.span("plan.engine", rows=len(scored_places)):
+        engine = geo.DistanceEngine(scored_places)
+    entry = {"version": version, "places": scored_places, "kinds": kinds, "top_count": top_count, "rest": rest,
+             "engine": engine}
+    _cache_put(key, entry)
+    return entry
+
+def shuffle_buckets(pool, seed):
+    """상위 그룹만 seed로 섞은 (관광, 식당, 숙소) 방문 후보 순서 - 장소 목록 대신 인덱스만 섞습니다."""
+    kinds = pool['kinds']
+    top_tier = list(range(pool['top_count']))
+    random.Random(seed).shuffle(top_tier)
+    return tuple([i for i in top_tier if kinds[i] == k] + pool['rest'][k] for k in ("sight", "food", "hotel"))
+
+def generate_plans(data, duration, optimize_routes=False, seed=None, themes=None):
+    city = data['dest_city']
+    user_styles = data['style']
+    if seed is None: seed = random.randrange(2 ** 32)
+    themes = [dict(t, name=t['name'].format(city=city)) for t in (themes or THEMES)]
     
+    # 1~2, 4. 중복 제거 / 점수 / 분류는 캐시된 후보군 사용
+    with diagnostics.span("plan.prepare_pool"):
+        pool = prepare_pool(city, user_styles)
+    places, engine = pool['places'], pool['engine']
+    if not places: return []
+
     # 3. 상위 그룹 셔플 (랜덤성 부여)
-    top_tier_count = min(len(scored_places), 40)
-    top_tier = scored_places[:top_tier_count]
-    rest_tier = scored_places[top_tier_count:]
-    random.shuffle(top_tier) 
-    shuffled_places = top_tier + rest_tier
-    
-    # 4. 카테고리 분류
-    food_keywords = ['음식', '식당', '카페', 'food', 'restaurant', 'cafe', 'bakery', 'meal', 'bar', 'pub']
-    hotel_keywords = ['hotel', 'motel', 'resort', 'pension', '숙소', '호텔', '리조트', '펜션']
-    
-    all_foods = [p for p in shuffled_places if any(k in str(p['category']).lower() for k in food_keywords)]
-    all_hotels = [p for p in shuffled_places if any(k in str(p['category']).lower() for k in hotel_keywords)]
-    all_sights = [p for p in shuffled_places if (p not in all_foods) and (p not in all_hotels)]
-    
-    themes = [
-        {"name": f"✨ {city} 맞춤 추천", "desc": "밸런스 최적 코스", "mix_ratio": "balanced"},
-        {"name": "🍽️ 식도락 여행", "desc": "맛집 위주 탐방", "mix_ratio": "food_heavy"},
-        {"name": "🔥 핫플레이스", "desc": "인기 명소 위주", "mix_ratio": "sight_heavy"},
-        {"name": "🌿 힐링 & 휴식", "desc": "여유로운 일정", "mix_ratio": "relaxed"}
-    ]
-    
-    final_plans = []
-    
-    for theme in themes:
-        pool_sights = all_sights[:] 
-        pool_foods = all_foods[:]
-        pool_hotels = all_hotels[:]
-        
-        random.shuffle(pool_sights)
-        random.shuffle(pool_foods)
-        
-        days = []
-        
-        # 테마별 스케줄 템플릿 설정
-        if theme['mix_ratio'] == 'food_heavy':
-            schedule_template = [
-                ("11:00", "아점", "food"), ("13:00", "산책", "sight"),
-                ("15:00", "카페", "food"), ("18:00", "저녁", "food"), ("21:00", "숙소", "hotel")
-            ]
-        elif theme['mix_ratio'] == 'relaxed':
-            schedule_template = [
-                ("10:30", "오전 여유", "sight"), ("13:00", "점심", "food"),
-                ("15:30", "오후 관광", "sight"), ("19:00", "저녁", "food"), ("21:00", "숙소", "hotel")
-            ]
-        else:
-            schedule_template = [
-                ("10:00", "오전 관광", "sight"), ("12:30", "점심", "food"),
-                ("15:00", "오후 관광", "sight"), ("18:30", "저녁", "food"), ("21:00", "숙소", "hotel")
-            ]
-
-        for d in range(1, duration + 1):
-            day_places = []
-            last_place = None 
-            
-            for time, type_name, p_type in schedule_template:
-                if p_type == "food": candidates = pool_foods
-                elif p_type == "hotel": candidates = pool_hotels
-                else: candidates = pool_sights
-                
-                if not candidates: continue 
-                
-                selected = None
-                if last_place is None:
-                    selected = candidates[0]
-                else:
-                    # 거리순 정렬 (Greedy)
-                    last_lat, last_lng = last_place['lat'], last_place['lng']
-                    candidates.sort(key=lambda p: haversine_distance(last_lat, last_lng, p.get('lat'), p.get('lng')))
-                    selected = candidates[0]
-                
-                if selected:
-                    candidates.remove(selected) 
-                    day_places.append(make_place(time, type_name, selected))
-                    last_place = selected 
-            
-            days.append({"day": d, "places": day_places})
-            
-        all_scores = [p['raw_score'] for d in days for p in d['places']]
-        avg_score = int(sum(all_scores) / len(all_scores)) if all_scores else 80
-        
-        final_plans.append({
-            "theme": theme['name'], "desc": theme['desc'], 
-            "score": avg_score, "tags": user_styles, "days": days
-        })
-    return final_plans
+    buckets = shuffle_buckets(pool, seed)
+
+    # 5. 테마별 일정 생성 (같은 프로세스의 스레드 풀: 후보군 / 엔진을 복사하거나 pickle 하지 않음)
+    args = (engine, buckets, duration, seed, optimize_routes)
+    with diagnostics.span("plan.routes", rows=len(themes)):
+        routes = _build_all_routes(themes, args)
+
+    with diagnostics.span("plan.finish", rows=len(themes)):
+        return [_finish_plan(theme, places, day_routes, distance_km, user_styles)
+                for theme, (day_routes, distance_km) in zip(themes, routes)]
     
+# --- [기능 9] 일정 결과 캐시: 요청 지문(도시, 스타일, 일수, 데이터 버전, seed) -> 일정 ---
+# 같은 seed면 같은 일정이 나오므로 결과를 그대로 재사용합니다. 모든 세션이 함께 쓰는 LRU.
+# 찾는 순서: 메모리 -> plan_store(python -m precompute로 미리 계산) -> generate_plans
+PLAN_CACHE_SIZE = 256
+_plan_cache = OrderedDict()
+_plan_lock = threading.Lock()
+
+def plan_fingerprint(city, styles, duration, version, seed, optimize_routes=True):
+    return (cities.city_id(city), plan_store.styles_key(styles), int(duration), version, int(seed), bool(optimize_routes))
+
+def get_plans(data, duration, seed=0, optimize_routes=True):
+    """
+    seed를 지정한 일정 생성 (캐시 사용). '다시 추천'은 seed만 바꿔서 부릅니다.
+    반환되는 일정은 캐시와 공유하지 않는 얕은 사본 (테마 이름은 입력한 도시 이름, seed 포함)
+    """
+    city = data['dest_city']
+    version = backend.get_data_version(city)
+    key = plan_fingerprint(city, data['style'], duration, version, seed, optimize_routes)
+    with _plan_lock:
+        plans = _plan_cache.get(key)
+        if plans is not None: _plan_cache.move_to_end(key)
+    if plans is not None:
+        diagnostics.count("cache.plan_hit")
+    else:
+        # 미리 계산한 일정은 동선 개선을 켠 것만 있음
+        plans = plan_store.load_plans(key[0], data['style'], duration, version, seed) if optimize_routes and version else None
+        diagnostics.count("cache.plan_store_hit" if plans else "cache.plan_miss")
+        if not plans: plans = generate_plans(data, duration, optimize_routes=optimize_routes, seed=seed)
+        if plans and version:  # DB를 못 읽었거나 데이터가 없으면 저장하지 않음
+            with _plan_lock:
+                _plan_cache[key] = plans
+                _plan_cache.move_to_end(key)
+                while len(_plan_cache) > PLAN_CACHE_SIZE:
+                    _plan_cache.popitem(last=False)
+    return [dict(plan, theme=theme['name'].format(city=city), seed=seed) for plan, theme in zip(plans, THEMES)]
+
 # --- [기능 6] DB 업데이트 ---
-def update_db(dest_city, styles):
-    backend.init_db() 
-    keywords = ["가볼만한곳", "명소", "숙소", "호텔"] + styles
-    # 국내/해외 모두 수집 시도
-    backend.fetch_all_data(dest_city, keywords, is_domestic=True)
-    backend.fetch_all_data(dest_city, keywords, is_domestic=False)
\ No newline at end of file
+def plan_refresh(dest_city, styles, ttl=None):
+    """
+    어떤 제공자에 어떤 키워드를 보낼지 한 번만 결정합니다.
+    (제공자/키워드 조합마다 요청은 정확히 1번)
+    ttl(초)이 주어지면 그 시간 안에 이미 수집한 요청은 fresh=True로,
+    최근에 실패해서 재시도 시각이 아직 안 된 요청은 backoff=True로 표시합니다.
+    계획만 세우므로 외부 API는 부르지 않습니다. (도시 중심 좌표도 저장된 장소로만 계산)
+    """
+    # 순서는 유지하면서 중복 키워드 제거
+    keywords = list(dict.fromkeys(["가볼만한곳", "명소", "숙소", "호텔"] + list(styles)))
+    is_domestic = check_is_domestic(dest_city)
+
+    tasks = [{"source": "google", "city": dest_city, "keyword": k} for k in keywords]
+    lat, lng = 0, 0
+    if is_domestic:
+        tasks += [{"source": "kakao", "city": dest_city, "keyword": k} for k in keywords]
+        if "관광" in keywords:
+            tasks.append({"source": "tourapi", "city": dest_city, "keyword": cities.city_id(dest_city)})
+    else:
+        # 아마데우스는 좌표 기반 검색: 좌표는 실제로 수집할 때 정합니다. (저장된 좌표가 없으면 그때 지오코딩)
+        lat, lng = backend.get_city_center(dest_city, geocode=False)
+        tasks.append({"source": "amadeus", "city": dest_city, "keyword": backend.AMADEUS_KEYWORD})
+
+    fetched = backend.get_fetch_times(dest_city) if ttl else {}
+    now = time.time()
+    for task in tasks:
+        task['enabled'] = backend.provider_enabled(task['source'])  # API 키 없으면 실행 시 건너뜀
+        last, retry_after = fetched.get((task['source'], str(task['keyword']))) or (None, None)
+        task['fresh'] = last is not None and now - last < ttl
+        task['backoff'] = not task['fresh'] and retry_after is not None and now < retry_after
+
+    return {"city": dest_city, "is_domestic": is_domestic, "center": (lat, lng),
+            "keywords": keywords, "tasks": tasks}
+
+def update_db(dest_city, styles, dry_run=False, force=False, ttl=None, progress=None):
+    """
+    증분 업데이트: TTL(기본 backend.FETCH_TTL) 안에 수집한 요청은 건너뛰고,
+    나머지만 보내서 새 장소는 추가 / 바뀐 장소(평점, 이미지 등)는 수정합니다.
+    최근에 실패한 요청도 재시도 시각 전까지는 건너뜁니다. (API 장애 때 매번 다시 보내지 않도록)
+    force=True면 TTL / 재시도 시각과 상관없이 전부 다시 수집하고, dry_run=True면 수집 계획만 반환합니다.
+    progress는 backend.run_fetch_tasks와 같은 형식 (끝난 요청 수, 전체 요청 수, 받은 장소 수)
+    """
+    plan = plan_refresh(dest_city, styles, ttl=None if force else (ttl or backend.FETCH_TTL))
+    if dry_run: return plan
+
+    backend.init_db()
+    pending = [t for t in plan['tasks'] if t['enabled'] and not t['fresh'] and not t['backoff']]
+    plan['fresh_skipped'] = sum(1 for t in plan['tasks'] if t['enabled'] and t['fresh'])
+    plan['backoff_skipped'] = sum(1 for t in plan['tasks'] if t['enabled'] and t['backoff'])
+    if any(t['source'] == "amadeus" for t in pending):
+        plan['center'] = lat, lng = backend.get_city_center(dest_city)
+        if lat == 0:  # 좌표를 못 구하면 실패로 기록 (재시도 대기 동안 다시 큐에 넣지 않도록)
+            backend.record_failures([(dest_city, "amadeus", backend.AMADEUS_KEYWORD)])
+            pending = [t for t in pending if t['source'] != "amadeus"]
+        for t in pending:
+            if t['source'] == "amadeus": t.update(lat=lat, lng=lng)
+    if not pending:
+        print(f"✅ {dest_city}: 보낼 요청이 없어 수집을 건너뜁니다. (최신 {plan['fresh_skipped']}건, 재시도 대기 {plan['backoff_skipped']}건)")
+        plan['result'] = backend.flush_places([])
+        return plan
+    plan['result'] = backend.run_fetch_plan(pending, progress)
+    if plan['result']['inserted'] or plan['result']['updated']:
+        invalidate_pool_cache(dest_city)  # 새 데이터가 들어온 도시만 후보군 캐시 비우기
+    return plan
+
+# 오래된 데이터는 먼저 보여주고 뒤에서 갱신 (stale-while-revalidate, 실제 실행은 jobs.py)
+STALE_WHILE_REVALIDATE = os.environ.get("STALE_WHILE_REVALIDATE", "1") == "1"
+
+def needs_refresh(dest_city, styles, ttl=None):
+    """TTL이 지난(또는 한 번도 안 한) 수집 요청이 하나라도 있으면 True (재시도 대기 중인 실패 요청은 제외)"""
+    plan = plan_refresh(dest_city, styles, ttl=ttl or backend.FETCH_TTL)
+    return any(t['enabled'] and not t['fresh'] and not t['backoff'] for t in plan['tasks'])